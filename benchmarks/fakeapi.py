@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STRATEGY = """def run(submission, checker, testset, limits):
+    executable = submission.source.compile()
+    testset.run(lambda test: checker.eval(executable, test, limits))
+    return testset.verdict
+"""
+
+TOKEN_CHECKER = """#!/bin/sh
+if [ "$(tr -s ' \\n' ' ' < "$2")" = "$(tr -s ' \\n' ' ' < "$3")" ]; then
+    echo "status: OK" > "$4"
+else
+    echo "status: WA" > "$4"
+fi
+"""
+
+CMP_CHECKER = """#!/bin/sh
+if cmp -s "$2" "$3"; then
+    echo "status: OK" > "$4"
+else
+    echo "status: WA" > "$4"
+fi
+"""
+
+PYTHON_CHECKER = """#!/usr/bin/env python3
+import sys
+with open(sys.argv[2]) as output, open(sys.argv[3]) as answer:
+    status = "OK" if output.read().split() == answer.read().split() else "WA"
+with open(sys.argv[4], mode='w') as judgement:
+    judgement.write(f"status: {status}\\n")
+"""
+
+
+class Problem:
+    def __init__(self, problem_id, checker, tests, limits=(1000, 262144, 5000)):
+        self.problem_id = problem_id
+        self.checker = checker
+        self.tests = tests
+        self.limits = limits
+        self.archive_path = self.build_archive()
+        self.problem_xml = self.build_problem_xml().encode()
+
+    def build_archive(self):
+        descriptor, archive_path = tempfile.mkstemp(prefix="novocode-benchmark-", suffix=".zip")
+        with os.fdopen(descriptor, mode='wb') as archive:
+            with zipfile.ZipFile(archive, mode='w', compression=zipfile.ZIP_STORED) as zip_file:
+                zip_file.writestr("strategy.py", STRATEGY)
+                zip_file.writestr("check", self.checker)
+                for number, (input_data, answer_data) in enumerate(self.tests, start=1):
+                    zip_file.writestr(f"tests/{number:04}", input_data())
+                    zip_file.writestr(f"tests/{number:04}.a", answer_data())
+        return archive_path
+
+    def build_problem_xml(self):
+        tests = "".join(
+            f'<test number="{number}">'
+            f'<test_data><file path="tests/{number:04}"/></test_data>'
+            f'<test_data><file path="tests/{number:04}.a"/></test_data>'
+            f'</test>'
+            for number in range(1, len(self.tests) + 1)
+        )
+        time_ms, memory_kb, real_time_ms = self.limits
+        return (
+            f'<problem path="strategy.py">'
+            f'<checker><file path="check"/></checker>'
+            f'<icpc_testset>{tests}</icpc_testset>'
+            f'<limits time_ms="{time_ms}" memory_kb="{memory_kb}" real_time_ms="{real_time_ms}"/>'
+            f'</problem>'
+        )
+
+
+class FakeNovocode:
+    def __init__(self):
+        self.problems = dict()
+        self.submissions = dict()
+        self.compilers = {"1": {"file_extension": ".sh", "compile_command": "", "run_command": "sh {0} {1}"}}
+        self.verdicts = dict()
+        self.finished = threading.Condition()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.port = self.server.server_port
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def add_problem(self, problem):
+        self.problems[str(problem.problem_id)] = problem
+
+    def add_submission(self, submission_id, problem_id, source):
+        self.submissions[str(submission_id)] = (str(problem_id), source.encode())
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for_verdicts(self, count, timeout):
+        with self.finished:
+            return self.finished.wait_for(lambda: len(self.verdicts) >= count, timeout)
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def send_body(self, body, content_type="application/json", head=False):
+                size = os.path.getsize(body) if isinstance(body, str) else len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(size))
+                self.send_header("ETag", f'"{size}"')
+                self.end_headers()
+                if head:
+                    return
+                if isinstance(body, str):
+                    with open(body, mode='rb') as file:
+                        shutil.copyfileobj(file, self.wfile)
+                else:
+                    self.wfile.write(body)
+
+            def route(self):
+                parts = self.path.strip('/').split('/')
+                if parts[:2] == ["api", "submissions"]:
+                    problem_id, source = api.submissions[parts[2]]
+                    return json.dumps({
+                        "problem": problem_id,
+                        "source": api.url(f"/files/sources/{parts[2]}"),
+                        "timestamp": "2024-01-01T00:00:00+00:00",
+                        "compiler": "1",
+                        "owner": "benchmark",
+                    }).encode(), "application/json"
+                if parts[:2] == ["api", "problems"]:
+                    return json.dumps({
+                        "problem_xml": api.url(f"/files/problems/{parts[2]}/problem.xml"),
+                        "problem_archive": api.url(f"/files/problems/{parts[2]}/problem.zip"),
+                    }).encode(), "application/json"
+                if parts[:2] == ["api", "compilers"]:
+                    return json.dumps(api.compilers[parts[2]]).encode(), "application/json"
+                if parts[:2] == ["files", "sources"]:
+                    return api.submissions[parts[2]][1], "text/plain"
+                if parts[:2] == ["files", "problems"]:
+                    problem = api.problems[parts[2]]
+                    if parts[3] == "problem.xml":
+                        return problem.problem_xml, "application/xml"
+                    return problem.archive_path, "application/zip"
+                return None, None
+
+            def do_GET(self):
+                body, content_type = self.route()
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_body(body, content_type)
+
+            def do_HEAD(self):
+                body, content_type = self.route()
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_body(body, content_type, head=True)
+
+            def do_PATCH(self):
+                length = int(self.headers["Content-Length"])
+                verdict = json.loads(self.rfile.read(length))["verdict"]
+                submission_id = self.path.strip('/').split('/')[2]
+                if verdict.get("format") != "testing":
+                    with api.finished:
+                        api.verdicts[submission_id] = verdict
+                        api.finished.notify_all()
+                self.send_body(b"{}")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,72 @@
+"""Stand-in for isolate that runs commands unsandboxed in a per-box directory."""
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+
+root = os.environ.get("FAKE_ISOLATE_ROOT", "/tmp/fake-isolate")
+options = dict()
+command = []
+arguments = sys.argv[1:]
+while arguments:
+    argument = arguments.pop(0)
+    if argument == "--":
+        command = arguments
+        break
+    if argument in ("-E", "--env", "--dir"):
+        arguments.pop(0)
+        continue
+    name, _, value = argument.partition("=")
+    options[name] = value
+
+box_root = os.path.join(root, options.get("--box-id", "0") or "0")
+box_path = os.path.join(box_root, "box")
+
+if "--cleanup" in options:
+    shutil.rmtree(box_root, ignore_errors=True)
+elif "--init" in options:
+    os.makedirs(box_path, exist_ok=True)
+    os.makedirs(os.path.join(box_root, "tmp"), exist_ok=True)
+    print(box_root)
+elif "--run" in options:
+    stdin_path = options.get("--stdin")
+    stdout_path = options.get("--stdout")
+    wall_time = float(options.get("--wall-time", "30"))
+    if command and os.path.exists(os.path.join(box_path, command[0])):
+        command[0] = os.path.join(box_path, command[0])
+    with (
+        open(os.path.join(box_path, stdin_path), mode='rb') if stdin_path else open(os.devnull, mode='rb') as stdin,
+        open(os.path.join(box_path, stdout_path), mode='wb') if stdout_path else open(os.devnull, mode='wb') as stdout,
+    ):
+        start = time.monotonic()
+        fsize = int(options["--fsize"]) * 1024 if "--fsize" in options else None
+        process = subprocess.Popen(
+            command, stdin=stdin, stdout=stdout, cwd=box_path,
+            preexec_fn=None if fsize is None else lambda: resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize)),
+        )
+        status = None
+        try:
+            process.wait(timeout=wall_time)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            status = "TO"
+        wall = time.monotonic() - start
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    if status is None and process.returncode < 0:
+        status = "SG"
+    elif status is None and process.returncode > 0:
+        status = "RE"
+    with open(options["--meta"], mode='w') as meta:
+        meta.write(f"time:{usage.ru_utime + usage.ru_stime:.3f}\n")
+        meta.write(f"time-wall:{wall:.3f}\n")
+        meta.write(f"max-rss:{usage.ru_maxrss}\n")
+        if process.returncode < 0:
+            meta.write(f"exitsig:{-process.returncode}\n")
+        else:
+            meta.write(f"exitcode:{process.returncode}\n")
+        if status is not None:
+            meta.write(f"status:{status}\n")
+    sys.exit(0 if status is None else 1)
@@ -0,0 +1,175 @@
+import fnmatch
+import threading
+import time
+from collections import deque
+
+
+class FakePipeline:
+    def __init__(self, r):
+        self.r = r
+        self.commands = []
+
+    def __getattr__(self, item):
+        def command(*args, **kwargs):
+            self.commands.append((item, args, kwargs))
+            return self
+        return command
+
+    def execute(self):
+        with self.r.condition:
+            return [getattr(self.r, item)(*args, **kwargs) for item, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.condition = threading.RLock()
+        self.changed = threading.Condition(self.condition)
+        self.lists = dict()
+        self.values = dict()
+        self.hashes = dict()
+        self.waiters = deque()
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def set(self, key, value, ex=None, nx=False):
+        with self.condition:
+            if nx and self.get(key) is not None:
+                return None
+            self.values[key] = (str(value), None if ex is None else time.monotonic() + ex)
+            return True
+
+    def get(self, key):
+        with self.condition:
+            value, expires = self.values.get(key, (None, None))
+            if expires is not None and expires < time.monotonic():
+                del self.values[key]
+                return None
+            return value
+
+    def exists(self, key):
+        with self.condition:
+            return int(self.get(key) is not None or bool(self.lists.get(key)))
+
+    def delete(self, *keys):
+        with self.condition:
+            deleted = 0
+            for key in keys:
+                deleted += int(any(
+                    container.pop(key, None) is not None for container in (self.values, self.lists, self.hashes)
+                ))
+            return deleted
+
+    def scan_iter(self, match="*"):
+        with self.condition:
+            keys = [
+                key for key in list(self.lists) + list(self.values) + list(self.hashes)
+                if fnmatch.fnmatchcase(key, match)
+            ]
+        return iter(keys)
+
+    def llen(self, key):
+        with self.condition:
+            return len(self.lists.get(key, ()))
+
+    def rpush(self, key, *values):
+        with self.condition:
+            self.lists.setdefault(key, deque()).extend(str(value) for value in values)
+            length = len(self.lists[key])
+            self.serve(key)
+            return length
+
+    def lpush(self, key, *values):
+        with self.condition:
+            self.lists.setdefault(key, deque()).extendleft(str(value) for value in values)
+            length = len(self.lists[key])
+            self.serve(key)
+            return length
+
+    def lpop(self, key):
+        with self.condition:
+            values = self.lists.get(key)
+            return values.popleft() if values else None
+
+    def serve(self, key):
+        for waiter in list(self.waiters):
+            if not self.lists.get(key):
+                break
+            keys, result = waiter
+            if key in keys:
+                self.waiters.remove(waiter)
+                result.append((key, self.lists[key].popleft()))
+        self.changed.notify_all()
+
+    def blpop(self, keys, timeout=0):
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            for key in keys:
+                if self.lists.get(key):
+                    return key, self.lpop(key)
+            waiter = (keys, [])
+            self.waiters.append(waiter)
+            while not waiter[1]:
+                remaining = deadline - time.monotonic()
+                if timeout and remaining <= 0:
+                    self.waiters.remove(waiter)
+                    return None
+                self.changed.wait(remaining if timeout else None)
+            return waiter[1][0]
+
+    def lrange(self, key, start, end):
+        with self.condition:
+            values = list(self.lists.get(key, ()))
+            return values[start:] if end == -1 else values[start:end + 1]
+
+    def lrem(self, key, count, value):
+        with self.condition:
+            values = self.lists.get(key)
+            removed = 0
+            while values and value in values and (count == 0 or removed < abs(count)):
+                values.remove(value)
+                removed += 1
+            return removed
+
+    def lpos(self, key, value):
+        with self.condition:
+            values = list(self.lists.get(key, ()))
+            return values.index(value) if value in values else None
+
+    def hset(self, key, field, value):
+        with self.condition:
+            self.hashes.setdefault(key, dict())[field] = str(value)
+            return 1
+
+    def hget(self, key, field):
+        with self.condition:
+            return self.hashes.get(key, dict()).get(field)
+
+    def hdel(self, key, *fields):
+        with self.condition:
+            values = self.hashes.get(key, dict())
+            return sum(int(values.pop(field, None) is not None) for field in fields)
+
+    def lmove(self, first_list, second_list, src="LEFT", dest="RIGHT"):
+        with self.condition:
+            source = self.lists.get(first_list)
+            if not source:
+                return None
+            value = source.popleft() if src == "LEFT" else source.pop()
+            destination = self.lists.setdefault(second_list, deque())
+            if dest == "LEFT":
+                destination.appendleft(value)
+            else:
+                destination.append(value)
+            self.serve(second_list)
+            return value
+
+    def blmove(self, first_list, second_list, timeout, src="LEFT", dest="RIGHT"):
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            while not self.lists.get(first_list):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.changed.wait(remaining)
+            return self.lmove(first_list, second_list, src, dest)
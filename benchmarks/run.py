@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_PATH = os.path.dirname(BENCHMARKS_PATH)
+BASELINES_PATH = os.path.join(BENCHMARKS_PATH, "baselines.json")
+HIGHER_IS_BETTER = {"submissions_per_second", "parses_per_second"}
+
+
+def peak_rss_kb():
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def configure_environment(working_path, port, args):
+    os.environ.update({
+        "NOVOCODE_HOST": "127.0.0.1",
+        "NOVOCODE_PORT": str(port),
+        "NOVOCODE_TOKEN": "benchmark",
+        "REDIS_HOST": "127.0.0.1",
+        "REDIS_PORT": "0",
+        "INVOKER_NAME": "benchmark",
+        "INVOKER_WORKERS": str(args.workers),
+        "ISOLATE_BOX_IDS": f"{args.first_box_id}-{args.first_box_id + args.workers * args.parallelism - 1}",
+        "TEST_PARALLELISM": str(args.parallelism),
+        "PROGRESS_INTERVAL": "1",
+        "WORKSPACE_PATH": os.path.join(working_path, "workspace"),
+        "PACKAGE_CACHE_PATH": os.path.join(working_path, "cache", "packages"),
+        "ARTIFACT_CACHE_PATH": os.path.join(working_path, "cache", "artifacts"),
+        "TEST_STATS_PATH": os.path.join(working_path, "cache", "teststats.sqlite3"),
+    })
+    if not args.real_isolate:
+        install_fake_isolate(os.path.join(working_path, "bin"))
+        os.environ["FAKE_ISOLATE_ROOT"] = os.path.join(working_path, "isolate")
+        os.environ["PATH"] = os.path.join(working_path, "bin") + os.pathsep + os.environ["PATH"]
+
+
+def install_fake_isolate(bin_path):
+    os.makedirs(bin_path, exist_ok=True)
+    isolate_path = os.path.join(bin_path, "isolate")
+    with open(os.path.join(BENCHMARKS_PATH, "fakeisolate.py")) as source, open(isolate_path, mode='w') as isolate:
+        isolate.write(f"#!{sys.executable} -S\n")
+        isolate.write(source.read())
+    os.chmod(isolate_path, 0o755)
+
+
+def run_invoker_scenario(scenario, args):
+    from benchmarks.fakeapi import FakeNovocode
+    from benchmarks.fakeredis import FakeRedis
+
+    api = FakeNovocode()
+    problem = scenario.build_problem(1)
+    api.add_problem(problem)
+    for submission_id in range(1, scenario.submissions + 1):
+        api.add_submission(submission_id, 1, scenario.solution)
+    api.start()
+
+    working_path = tempfile.mkdtemp(prefix="novocode-benchmark-")
+    configure_environment(working_path, api.port, args)
+    os.chdir(working_path)
+    sys.path.insert(0, REPOSITORY_PATH)
+    import invoker
+    import submissionqueue
+    from strategy.artifactcache import ArtifactCache, set_artifact_cache
+
+    set_artifact_cache(ArtifactCache(invoker.ARTIFACT_CACHE_PATH, invoker.ARTIFACT_CACHE_SIZE_MB * 1024 * 1024))
+    queue = submissionqueue.SubmissionQueue(FakeRedis(), invoker.INVOKER_NAME, classify=invoker.classify_submission)
+    invoker.progress.start()
+    workers = invoker.start_workers(queue)
+
+    start = time.monotonic()
+    for submission_id in range(1, scenario.submissions + 1):
+        queue.r.rpush(submissionqueue.SUBMISSIONS_KEY, submission_id)
+    finished = api.wait_for_verdicts(scenario.submissions, args.timeout)
+    elapsed = time.monotonic() - start
+
+    invoker.interrupted = True
+    for worker in workers:
+        worker.join()
+    invoker.progress.stop()
+    api.stop()
+
+    failed = [verdict for verdict in api.verdicts.values() if verdict.get("format") != "icpc"
+              or verdict.get("first_test_failed") is not None]
+    if not finished or failed:
+        raise RuntimeError(f"Scenario {scenario.name} did not judge every submission as accepted: {failed}")
+    test_runs = scenario.submissions * len(problem.tests)
+    return {
+        "submissions_per_second": scenario.submissions / elapsed,
+        "per_test_ms": elapsed * 1000 / test_runs,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_parse_scenario(args):
+    sys.path.insert(0, REPOSITORY_PATH)
+    from benchmarks.fakeapi import Problem, TOKEN_CHECKER
+    from benchmarks.scenarios import PARSE_TESTS, text
+    from packageparser import parse_package
+    import zipfile
+
+    working_path = tempfile.mkdtemp(prefix="novocode-benchmark-")
+    problem = Problem(1, TOKEN_CHECKER, [(text("1 2\n"), text("3\n"))] * PARSE_TESTS)
+    with zipfile.ZipFile(problem.archive_path) as zip_file:
+        zip_file.extractall(working_path)
+    xml_path = os.path.join(working_path, "problem.xml")
+    with open(xml_path, mode='wb') as problem_xml:
+        problem_xml.write(problem.problem_xml)
+
+    parses = 20
+    start = time.monotonic()
+    for _ in range(parses):
+        parse_package(xml_path, working_path)
+    elapsed = time.monotonic() - start
+    return {"parses_per_second": parses / elapsed, "peak_rss_kb": peak_rss_kb()}
+
+
+def run_child(name, args):
+    from benchmarks.scenarios import SCENARIOS
+    if name == "parse_package":
+        return run_parse_scenario(args)
+    return run_invoker_scenario(SCENARIOS[name], args)
+
+
+def compare(results, baselines, tolerance):
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            baseline = baselines.get(name, {}).get(metric)
+            if baseline is None:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                regressed = value < baseline * (1 - tolerance)
+            else:
+                regressed = value > baseline * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{name}.{metric}: {value:.3f} (baseline {baseline:.3f})")
+    return regressions
+
+
+def main():
+    from benchmarks.scenarios import SCENARIOS
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks for the Novocode invoker.")
+    parser.add_argument("scenarios", nargs='*', default=[*SCENARIOS, "parse_package"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--parallelism", type=int, default=1)
+    parser.add_argument("--first-box-id", type=int, default=100)
+    parser.add_argument("--real-isolate", action="store_true")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args)))
+        return
+
+    results = dict()
+    for name in args.scenarios:
+        command = [sys.executable, "-m", "benchmarks.run", "--child", name, *child_arguments(args)]
+        output = subprocess.run(command, cwd=REPOSITORY_PATH, capture_output=True, text=True)
+        if output.returncode != 0:
+            sys.stderr.write(output.stderr)
+            sys.exit(f"Scenario {name} failed.")
+        results[name] = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"{name}: " + ", ".join(f"{metric}={value:.3f}" for metric, value in results[name].items()))
+
+    baselines = dict()
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as baselines_file:
+            baselines = json.load(baselines_file)
+    regressions = compare(results, baselines, args.tolerance)
+
+    if args.output:
+        with open(args.output, mode='w') as output_file:
+            json.dump({"results": results, "regressions": regressions}, output_file, indent=2)
+    if args.update_baselines:
+        baselines.update(results)
+        with open(BASELINES_PATH, mode='w') as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+            baselines_file.write("\n")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions and not args.update_baselines:
+        sys.exit(1)
+
+
+def child_arguments(args):
+    arguments = [
+        f"--workers={args.workers}",
+        f"--parallelism={args.parallelism}",
+        f"--first-box-id={args.first_box_id}",
+        f"--timeout={args.timeout}",
+    ]
+    if args.real_isolate:
+        arguments.append("--real-isolate")
+    return arguments
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from benchmarks.fakeapi import CMP_CHECKER, PYTHON_CHECKER, TOKEN_CHECKER, Problem
+
+SUM_SOLUTION = "read a b\necho $((a + b))\n"
+CAT_SOLUTION = "cat\n"
+
+
+class Scenario:
+    def __init__(self, name, build_problem, solution, submissions):
+        self.name = name
+        self.build_problem = build_problem
+        self.solution = solution
+        self.submissions = submissions
+
+
+def text(data):
+    return lambda: data
+
+
+def huge_data():
+    line = ("0123456789" * 10 + "\n").encode()
+    return line * (16 * 1024 * 1024 // len(line))
+
+
+def many_tiny_tests(problem_id):
+    tests = [(text(f"{number} {number * 7}\n"), text(f"{number * 8}\n")) for number in range(1, 101)]
+    return Problem(problem_id, TOKEN_CHECKER, tests)
+
+
+def few_huge_tests(problem_id):
+    return Problem(problem_id, CMP_CHECKER, [(huge_data, huge_data) for _ in range(3)])
+
+
+def checker_heavy(problem_id):
+    tests = [(text(f"{number} {number}\n"), text(f"{number * 2}\n")) for number in range(1, 31)]
+    return Problem(problem_id, PYTHON_CHECKER, tests)
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario("many_tiny_tests", many_tiny_tests, SUM_SOLUTION, 4),
+        Scenario("few_huge_tests", few_huge_tests, CAT_SOLUTION, 2),
+        Scenario("checker_heavy", checker_heavy, SUM_SOLUTION, 4),
+    ]
+}
+
+PARSE_TESTS = 5000
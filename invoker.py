@@ -1,25 +1,36 @@
 import asyncio
-import io
+import datetime
 import logging
 import os
-import shutil
 
+import novocodeapi
+import packagecache
 import packageparser
+import progressreporter
+import submissionqueue
 import strategy
+import strategyloader
+import telemetry
+import teststats
 import traceback
-import importlib
 import redis
 import signal
+import socket
+import threading
 import time
-import requests
 import zipfile
 import verdictserializer
 import dateutil.parser
 from dotenv import load_dotenv
 
-from strategy.executable import Compilable
+from strategy.artifactcache import ArtifactCache, set_artifact_cache
+from strategy.box import box_session, set_box_pool, use_box_id
+from strategy.events import add_phase_listener, phase
+from strategy.executable import Compilable, use_build_directory
+from strategy.pool import ResourcePool
+from strategy.precompiledheaders import PrecompiledHeaders, set_precompiled_headers
 from strategy.submission import Submission
-from strategy.test import TestSet
+from strategy.test import ICPCTestSet, TestSet
 from strategy.verdicts import TestingVerdict
 
 load_dotenv()
@@ -29,20 +40,38 @@ NOVOCODE_PORT = int(os.environ.get("NOVOCODE_PORT"))
 NOVOCODE_TOKEN = os.environ.get("NOVOCODE_TOKEN")
 REDIS_HOST = os.environ.get("REDIS_HOST")
 REDIS_PORT = int(os.environ.get("REDIS_PORT"))
-
-
-def request_get(endpoint):
-    url = f"http://{NOVOCODE_HOST}:{NOVOCODE_PORT}/api/{endpoint}"
-    return requests.get(url, headers={'Authorization': f'Token {NOVOCODE_TOKEN}'})
-
-
-def request_get_file(url):
-    return requests.get(url, headers={'Authorization': f'Token {NOVOCODE_TOKEN}'})
-
-
-def request_patch(endpoint, json):
-    url = f"http://{NOVOCODE_HOST}:{NOVOCODE_PORT}/api/{endpoint}"
-    requests.patch(url, json=json, headers={'Authorization': f'Token {NOVOCODE_TOKEN}'})
+WORKSPACE_PATH = os.environ.get("WORKSPACE_PATH", "./workspace")
+INVOKER_WORKERS = int(os.environ.get("INVOKER_WORKERS", "1"))
+TEST_PARALLELISM = int(os.environ.get("TEST_PARALLELISM", "1"))
+ISOLATE_BOX_IDS = os.environ.get("ISOLATE_BOX_IDS", f"0-{INVOKER_WORKERS * TEST_PARALLELISM - 1}")
+INVOKER_NAME = os.environ.get("INVOKER_NAME", f"{socket.gethostname()}-{os.getpid()}")
+PACKAGE_CACHE_PATH = os.environ.get("PACKAGE_CACHE_PATH", "./cache/packages")
+PACKAGE_CACHE_SIZE_MB = int(os.environ.get("PACKAGE_CACHE_SIZE_MB", "10240"))
+ARTIFACT_CACHE_PATH = os.environ.get("ARTIFACT_CACHE_PATH", "./cache/artifacts")
+ARTIFACT_CACHE_SIZE_MB = int(os.environ.get("ARTIFACT_CACHE_SIZE_MB", "2048"))
+NOVOCODE_CONNECT_TIMEOUT = float(os.environ.get("NOVOCODE_CONNECT_TIMEOUT", "5"))
+NOVOCODE_READ_TIMEOUT = float(os.environ.get("NOVOCODE_READ_TIMEOUT", "60"))
+NOVOCODE_RETRIES = int(os.environ.get("NOVOCODE_RETRIES", "3"))
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", "1"))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_TEXTFILE = os.environ.get("METRICS_TEXTFILE")
+PCH_CACHE_PATH = os.environ.get("PCH_CACHE_PATH", "./cache/pch")
+PRECOMPILED_HEADERS = int(os.environ.get("PRECOMPILED_HEADERS", "1"))
+TEST_STATS_PATH = os.environ.get("TEST_STATS_PATH", "./cache/teststats.sqlite3")
+PROBE_TESTS = int(os.environ.get("PROBE_TESTS", "0"))
+REDIS_RETRY_DELAY = float(os.environ.get("REDIS_RETRY_DELAY", "1"))
+REDIS_RETRY_MAX_DELAY = float(os.environ.get("REDIS_RETRY_MAX_DELAY", "30"))
+VERDICT_ENCODINGS = [
+    encoding for encoding in os.environ.get("VERDICT_ENCODINGS", "compact+zlib,compact").split(",") if encoding
+]
+
+
+api = novocodeapi.NovocodeClient(
+    NOVOCODE_HOST, NOVOCODE_PORT, NOVOCODE_TOKEN,
+    timeout=(NOVOCODE_CONNECT_TIMEOUT, NOVOCODE_READ_TIMEOUT),
+    retries=NOVOCODE_RETRIES,
+    pool_size=max(16, 4 * INVOKER_WORKERS),
+)
 
 
 def signal_handler(signal, frame):
@@ -52,49 +81,38 @@ def signal_handler(signal, frame):
 
 interrupted = False
 
-submission_source_path = os.environ.get("SUBMISSION_SOURCE_PATH")
-problem_xml_path = os.environ.get("PROBLEM_XML_PATH")
-problem_directory_path = os.environ.get("PROBLEM_DIRECTORY_PATH")
 
+def parse_box_ids(spec):
+    box_ids = []
+    for part in spec.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            box_ids.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            box_ids.append(int(part))
+    return box_ids
 
-def clear_downloaded_files():
-    for file in os.listdir("./downloaded"):
-        file_path = os.path.join('./downloaded', file)
-        if os.path.isfile(file_path):
-            os.remove(file_path)
-
-    for file in os.listdir(problem_directory_path):
-        file_path = os.path.join(problem_directory_path, file)
-        if os.path.isfile(file_path):
-            os.remove(file_path)
-        elif os.path.isdir(file_path):
-            shutil.rmtree(file_path)
 
+class Workspace:
+    def __init__(self, path):
+        self.path = path
+        self.downloaded_path = os.path.join(path, "downloaded")
+        self.submission_source_path = os.path.join(self.downloaded_path, "submission")
+        os.makedirs(self.downloaded_path, exist_ok=True)
 
-def download_problem_and_submission(submission_id):
-    submission_response = request_get(f'submissions/{submission_id}').json()
 
-    problem_id = str(submission_response["problem"])
-    problem_response = request_get(f"problems/{problem_id}").json()
+def clear_downloaded_files(workspace):
+    for file in os.listdir(workspace.downloaded_path):
+        file_path = os.path.join(workspace.downloaded_path, file)
+        if os.path.isfile(file_path):
+            os.remove(file_path)
 
-    submission_source_response = request_get_file(submission_response["source"])
-    problem_xml_response = request_get_file(problem_response["problem_xml"])
-    problem_zip_response = request_get_file(problem_response["problem_archive"])
 
+def make_submission(submission_response, compiler_response, workspace):
     submission_timestamp = dateutil.parser.parse(submission_response["timestamp"])
-    compiler_id = str(submission_response["compiler"])
-
-    compiler_response = request_get(f'compilers/{compiler_id}').json()
-
-    global submission_source_path
-    submission_source_path = submission_source_path + compiler_response["file_extension"]
 
-    with open(submission_source_path, mode='wb') as submission_source:
-        submission_source.write(submission_source_response.content)
-    with open(problem_xml_path, mode='wb') as problem_xml:
-        problem_xml.write(problem_xml_response.content)
-    with zipfile.ZipFile(io.BytesIO(problem_zip_response.content), 'r') as zip_ref:
-        zip_ref.extractall(problem_directory_path)
+    submission_source_path = workspace.submission_source_path + compiler_response["file_extension"]
+    os.rename(workspace.submission_source_path, submission_source_path)
 
     return Submission(
         Compilable(submission_source_path, compiler_response["compile_command"], compiler_response["run_command"]),
@@ -102,57 +120,217 @@ def download_problem_and_submission(submission_id):
     )
 
 
+def problem_version(problem_response):
+    archive_headers = api.head_file(problem_response["problem_archive"])
+    return (
+        problem_response.get("version"),
+        problem_response["problem_xml"],
+        problem_response["problem_archive"],
+        archive_headers.get("ETag"),
+        archive_headers.get("Last-Modified"),
+    )
+
+
+def download_problem(problem_response, entry):
+    problem_zip_path = os.path.join(entry.path, "problem.zip")
+    problem_xml_future = api.submit(api.download, problem_response["problem_xml"], entry.problem_xml_path)
+    with phase("package_download"):
+        api.download(problem_response["problem_archive"], problem_zip_path)
+        problem_xml_future.result()
+
+    with phase("extraction"), zipfile.ZipFile(problem_zip_path, 'r') as zip_ref:
+        zip_ref.extractall(entry.package_path)
+    os.remove(problem_zip_path)
+
+
 def try_hook_testset(submission_id, arguments):
     def set_test_lambda(test: int):
         logging.info(f"Testing on test {test}")
         verdict = TestingVerdict(test)
         serialized_verdict = verdictserializer.get_verdict_serializer(verdict)(verdict)
-        submit_verdict(submission_id, serialized_verdict)
+        progress.update(submission_id, serialized_verdict)
     for arg in arguments:
         if isinstance(arg, TestSet):
             arg.add_on_next(set_test_lambda)
 
 
+def configure_testsets(arguments, problem_key, test_stats):
+    for arg in arguments:
+        if isinstance(arg, TestSet):
+            arg.set_parallelism(TEST_PARALLELISM)
+        if isinstance(arg, ICPCTestSet) and PROBE_TESTS > 0:
+            arg.set_priorities(test_stats.priorities(problem_key), PROBE_TESTS)
+
+
+def record_test_stats(arguments, problem_key, test_stats):
+    for arg in arguments:
+        if isinstance(arg, TestSet):
+            verdicts = [(test.number, test.verdict) for test in arg.tests if test.verdict is not None]
+            test_stats.record(problem_key, verdicts)
+
+
+strategy_loader = strategyloader.StrategyLoader()
+
+
 def run_strategy(strategy_path, arguments):
-    strategy_mod = importlib.import_module(strategy_path.rsplit('.', 1)[0].replace('/', '.').lstrip('.'))
-    importlib.reload(strategy_mod)
+    strategy_mod = strategy_loader.load(strategy_path)
     verdict = strategy_mod.run(*arguments)
     return verdict
 
 
 def submit_verdict(submission_id, verdict):
-    request_patch(f"submissions/{submission_id}", json={'verdict': verdict})
+    api.patch(f"submissions/{submission_id}", json={'verdict': verdict})
+
+
+progress = progressreporter.ProgressReporter(submit_verdict, PROGRESS_INTERVAL)
+
+
+def classify_submission(submission_id):
+    submission_response = api.get(f'submissions/{submission_id}')
+    return submission_response.get("priority_class"), submission_response["owner"]
 
 
-def loop(r):
+def record_queue_wait(submission_response):
+    submission_timestamp = dateutil.parser.parse(submission_response["timestamp"])
+    queue_wait = datetime.datetime.now(submission_timestamp.tzinfo) - submission_timestamp
+    telemetry.record_phase("queue_wait", max(queue_wait.total_seconds(), 0), dict())
+
+
+def judge(submission_id, workspace, package_cache, test_stats):
+    logging.info(f"Starting testing submission {submission_id}")
+    progress.begin(submission_id)
+    labels_token = telemetry.submission_labels.set(dict())
+    outcome = "judge_error"
+    try:
+        with phase("download"):
+            submission_response = api.get(f'submissions/{submission_id}')
+            problem_id = str(submission_response["problem"])
+            compiler_id = str(submission_response["compiler"])
+            telemetry.submission_labels.set({"problem": problem_id, "compiler": compiler_id})
+            record_queue_wait(submission_response)
+            problem_future = api.submit(api.get, f"problems/{problem_id}")
+            compiler_future = api.submit(api.get, f'compilers/{compiler_id}')
+            source_future = api.submit(api.download, submission_response["source"], workspace.submission_source_path)
+            problem_response = problem_future.result()
+            problem_version_future = api.submit(problem_version, problem_response)
+            source_future.result()
+            submission = make_submission(submission_response, compiler_future.result(), workspace)
+            package_key = package_cache.key(problem_id, problem_version_future.result())
+
+        with package_cache.lease(package_key, lambda entry: download_problem(problem_response, entry)) as package:
+            strategy_path, arguments = packageparser.parse_package(
+                package.problem_xml_path, package.package_path, package.manifest_path
+            )
+            try_hook_testset(submission_id, arguments)
+            configure_testsets(arguments, package_key, test_stats)
+            verdict = run_strategy(strategy_path, [submission, *arguments])
+            record_test_stats(arguments, package_key, test_stats)
+        encoding = verdictserializer.negotiate_encoding(
+            submission_response.get("verdict_encodings") or [], VERDICT_ENCODINGS
+        )
+        serialized_verdict = verdictserializer.get_verdict_serializer(verdict, encoding)(verdict)
+        outcome = verdict.status
+        logging.info(f"Finished testing submission {submission_id}. Got verdict: {serialized_verdict}")
+    except BaseException as ex:
+        logging.info(f"Failed to test {submission_id}, caught exception: {ex}")
+        logging.info(''.join(traceback.format_exception(ex)))
+        serialized_verdict = {"format": "judge_error"}
+    finally:
+        telemetry.submissions_total.inc(**telemetry.submission_labels.get(), outcome=outcome)
+        telemetry.submission_labels.reset(labels_token)
+        clear_downloaded_files(workspace)
+    with phase("verdict_submission"):
+        progress.finish(submission_id, serialized_verdict)
+
+
+def retry_redis(action, description):
+    delay = REDIS_RETRY_DELAY
     while not interrupted:
-        if r.llen("novocode:submissions") == 0:
-            time.sleep(0.1)
+        try:
+            return action()
+        except redis.RedisError as ex:
+            logging.warning(f"Failed to {description}, retrying in {delay}s: {ex}")
+            time.sleep(delay)
+            delay = min(delay * 2, REDIS_RETRY_MAX_DELAY)
+    return None
+
+
+def loop(queue, consumer, workspace, box_pool, package_cache, test_stats):
+    while not interrupted:
+        submission_id = retry_redis(lambda: queue.pop(consumer), "pop a submission")
+        if submission_id is None:
             continue
-        submission_id = r.lpop("novocode:submissions")
 
-        logging.info(f"Starting testing submission {submission_id}")
+        telemetry.active_workers.inc()
         try:
-            submission = download_problem_and_submission(submission_id)
-            strategy_path, arguments = packageparser.parse_package(problem_xml_path, problem_directory_path)
-            try_hook_testset(submission_id, arguments)
-            verdict = run_strategy(strategy_path, [submission, *arguments])
-            serialized_verdict = verdictserializer.get_verdict_serializer(verdict)(verdict)
-            submit_verdict(submission_id, serialized_verdict)
-            logging.info(f"Finished testing submission {submission_id}. Got verdict: {serialized_verdict}")
+            with (
+                box_pool.lease() as box_id,
+                use_box_id(box_id),
+                box_session(),
+                use_build_directory(workspace.downloaded_path),
+            ):
+                judge(submission_id, workspace, package_cache, test_stats)
         except BaseException as ex:
-            submit_verdict(submission_id, {"format": "judge_error"})
-            logging.info(f"Failed to test {submission_id}, caught exception: {ex}")
-            logging.info(''.join(traceback.format_exception(ex)))
-        clear_downloaded_files()
+            logging.info(f"Failed to deliver verdict for {submission_id}, requeueing it: {ex}")
+            retry_redis(lambda: queue.requeue(consumer, submission_id), f"requeue submission {submission_id}")
+            continue
+        finally:
+            telemetry.active_workers.dec()
+        retry_redis(lambda: queue.ack(consumer, submission_id), f"acknowledge submission {submission_id}")
+
+
+def start_workers(queue):
+    box_ids = parse_box_ids(ISOLATE_BOX_IDS)
+    if len(box_ids) < INVOKER_WORKERS:
+        raise ValueError(f"ISOLATE_BOX_IDS has {len(box_ids)} boxes, but INVOKER_WORKERS is {INVOKER_WORKERS}")
+    box_pool = ResourcePool(box_ids[:INVOKER_WORKERS])
+    lane_pool = ResourcePool(box_ids[INVOKER_WORKERS:])
+    set_box_pool(lane_pool)
+    telemetry.box_pool_size.set(len(box_ids))
+    telemetry.registry.add_collector(
+        lambda: telemetry.box_pool_in_use.set(box_pool.in_use() + lane_pool.in_use())
+    )
+    queue.capacity = lambda: box_pool.capacity - box_pool.in_use()
+    queue.start_dispatcher()
+    package_cache = packagecache.PackageCache(PACKAGE_CACHE_PATH, PACKAGE_CACHE_SIZE_MB * 1024 * 1024)
+    test_stats = teststats.TestStats(TEST_STATS_PATH)
+    workers = []
+    for index in range(INVOKER_WORKERS):
+        workspace = Workspace(os.path.join(WORKSPACE_PATH, str(index)))
+        worker = threading.Thread(
+            target=loop, args=(queue, str(index), workspace, box_pool, package_cache, test_stats), name=f"worker-{index}"
+        )
+        worker.start()
+        workers.append(worker)
+    return workers
+
+
+def start_telemetry(queue):
+    add_phase_listener(telemetry.record_phase)
+    telemetry.registry.add_collector(lambda: telemetry.queue_depth.set(queue.depth()))
+    if METRICS_PORT:
+        telemetry.registry.serve(METRICS_PORT)
+    if METRICS_TEXTFILE:
+        telemetry.registry.write_textfile_periodically(METRICS_TEXTFILE, 15, queue.stopped)
 
 
 def main():
     signal.signal(signal.SIGINT, signal_handler)
     logging.getLogger().setLevel(logging.INFO)
     logging.info("Started Novocode Invoker.")
+    set_artifact_cache(ArtifactCache(ARTIFACT_CACHE_PATH, ARTIFACT_CACHE_SIZE_MB * 1024 * 1024))
+    if PRECOMPILED_HEADERS:
+        set_precompiled_headers(PrecompiledHeaders(PCH_CACHE_PATH))
     r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
-    loop(r)
+    queue = submissionqueue.SubmissionQueue(r, INVOKER_NAME, classify=classify_submission)
+    start_telemetry(queue)
+    queue.reclaim()
+    queue.start_heartbeat()
+    progress.start()
+    for worker in start_workers(queue):
+        worker.join()
+    progress.stop()
+    queue.stop()
     logging.info("Shutting down Novocode Invoker.")
 
 
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+class NovocodeClient:
+    def __init__(self, host, port, token, timeout=(5, 60), retries=3, backoff=0.5, pool_size=16):
+        self.base_url = f"http://{host}:{port}/api"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Token {token}"
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "PATCH"}),
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="novocode-api")
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+    def get(self, endpoint):
+        response = self.session.get(f"{self.base_url}/{endpoint}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def head_file(self, url):
+        response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+        response.raise_for_status()
+        return response.headers
+
+    def download(self, url, path):
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            with open(path, mode='wb') as file:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+        return path
+
+    def patch(self, endpoint, json):
+        response = self.session.patch(f"{self.base_url}/{endpoint}", json=json, timeout=self.timeout)
+        response.raise_for_status()
+        return response
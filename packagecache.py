@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import threading
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+class PackageEntry:
+    def __init__(self, path):
+        self.path = path
+        self.problem_xml_path = os.path.join(path, "problem.xml")
+        self.package_path = os.path.join(path, "package")
+        self.manifest_path = f"{path}.manifest"
+
+
+def make_read_only(path):
+    for directory, directories, files in os.walk(path):
+        for file in files:
+            file_path = os.path.join(directory, file)
+            mode = os.stat(file_path).st_mode
+            os.chmod(file_path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+        os.chmod(directory, 0o555)
+
+
+def make_writable(path):
+    for directory, directories, files in os.walk(path):
+        os.chmod(directory, 0o755)
+
+
+def tree_size(path):
+    size = 0
+    for directory, directories, files in os.walk(path):
+        for file in files:
+            size += os.lstat(os.path.join(directory, file)).st_size
+    return size
+
+
+class PackageCache:
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.key_locks = defaultdict(threading.Lock)
+        self.pins = Counter()
+        self.sizes = dict()
+        os.makedirs(self.path, exist_ok=True)
+        for name in os.listdir(self.path):
+            entry_path = os.path.join(self.path, name)
+            if not os.path.isdir(entry_path):
+                continue
+            if name.startswith('.'):
+                make_writable(entry_path)
+                shutil.rmtree(entry_path, ignore_errors=True)
+            else:
+                self.sizes[name] = tree_size(entry_path)
+
+    @staticmethod
+    def key(problem_id, version):
+        return f"{problem_id}-{hashlib.sha256(str(version).encode()).hexdigest()[:16]}"
+
+    def total_size(self):
+        return sum(self.sizes.values())
+
+    @contextmanager
+    def lease(self, key, fetch):
+        with self.lock:
+            key_lock = self.key_locks[key]
+            self.pins[key] += 1
+        with key_lock:
+            try:
+                entry = self.get_or_build(key, fetch)
+            except BaseException:
+                self.unpin(key)
+                raise
+        try:
+            yield entry
+        finally:
+            self.unpin(key)
+            self.evict()
+
+    def unpin(self, key):
+        with self.lock:
+            self.pins[key] -= 1
+            if self.pins[key] == 0:
+                del self.pins[key]
+
+    def get_or_build(self, key, fetch):
+        entry_path = os.path.join(self.path, key)
+        if os.path.isdir(entry_path):
+            os.utime(entry_path)
+            return PackageEntry(entry_path)
+
+        logging.info(f"Package {key} is not cached, downloading it")
+        build_path = os.path.join(self.path, f".{key}-{uuid.uuid4().hex}")
+        os.makedirs(build_path)
+        try:
+            entry = PackageEntry(build_path)
+            fetch(entry)
+            size = tree_size(build_path)
+            make_read_only(build_path)
+            os.rename(build_path, entry_path)
+        except BaseException:
+            make_writable(build_path)
+            shutil.rmtree(build_path, ignore_errors=True)
+            raise
+        with self.lock:
+            self.sizes[key] = size
+        return PackageEntry(entry_path)
+
+    def evict(self):
+        with self.lock:
+            if self.total_size() <= self.max_bytes:
+                return
+            candidates = sorted(
+                (key for key in self.sizes if key not in self.pins),
+                key=lambda key: os.stat(os.path.join(self.path, key)).st_mtime,
+            )
+            evicted = []
+            for key in candidates:
+                if self.total_size() <= self.max_bytes:
+                    break
+                del self.sizes[key]
+                manifest_path = PackageEntry(os.path.join(self.path, key)).manifest_path
+                if os.path.exists(manifest_path):
+                    os.remove(manifest_path)
+                trash_path = os.path.join(self.path, f".{key}-{uuid.uuid4().hex}")
+                os.rename(os.path.join(self.path, key), trash_path)
+                evicted.append(trash_path)
+        for trash_path in evicted:
+            logging.info(f"Evicted package {os.path.basename(trash_path)} from cache")
+            make_writable(trash_path)
+            shutil.rmtree(trash_path, ignore_errors=True)
@@ -1,15 +1,65 @@
-import xml.etree.ElementTree as ET
 import os
+import pickle
+import uuid
+import xml.etree.ElementTree as ET
 from parser import get_xml_tag_parser
 
+MANIFEST_VERSION = 4
+STREAMED_TAGS = {"testset", "icpc_testset", "ioi_testset"}
+
+
+def parse_package(xml_path, package_path, manifest_path=None):
+    if manifest_path is not None:
+        manifest = load_manifest(manifest_path)
+        if manifest is not None:
+            return manifest
+
+    strategy_path, arguments = stream_parse_package(xml_path, package_path)
+
+    if manifest_path is not None:
+        store_manifest(manifest_path, strategy_path, arguments)
+    return strategy_path, arguments
 
-def parse_package(xml_path, package_path):
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    strategy_path = os.path.join(package_path, root.attrib["path"])
 
+def stream_parse_package(xml_path, package_path):
+    strategy_path = None
     arguments = []
-    for child in tree.getroot():
-        arguments.append(get_xml_tag_parser(child.tag)(child, package_path))
+    elements = []
+    streamed_children = []
+    for event, element in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            if not elements:
+                strategy_path = os.path.join(package_path, element.attrib["path"])
+            elements.append(element)
+            continue
+        elements.pop()
+        if len(elements) == 2 and elements[1].tag in STREAMED_TAGS:
+            streamed_children.append(get_xml_tag_parser(element.tag)(element, package_path))
+            elements[1].remove(element)
+        elif len(elements) == 1:
+            if element.tag in STREAMED_TAGS:
+                arguments.append(get_xml_tag_parser(element.tag)(element, package_path, streamed_children))
+                streamed_children = []
+            else:
+                arguments.append(get_xml_tag_parser(element.tag)(element, package_path))
+            elements[0].remove(element)
+
+    return strategy_path, arguments
 
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, mode='rb') as manifest_file:
+            version, strategy_path, arguments = pickle.load(manifest_file)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    if version != MANIFEST_VERSION:
+        return None
     return strategy_path, arguments
+
+
+def store_manifest(manifest_path, strategy_path, arguments):
+    temporary_path = f"{manifest_path}.{uuid.uuid4().hex}"
+    with open(temporary_path, mode='wb') as manifest_file:
+        pickle.dump((MANIFEST_VERSION, strategy_path, arguments), manifest_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, manifest_path)
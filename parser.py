@@ -1,8 +1,9 @@
-import io
 import os
-from strategy.test import Test, TestSet, ICPCTestSet
+from strategy.files import LazyFile, LazyText
+from strategy.test import Test, TestSet, ICPCTestSet, TestGroup, IOITestSet
 from strategy.metrics import Limits
 from strategy.checker import Checker, TestlibChecker
+from strategy.comparators import DoubleChecker, ExactChecker, TokenChecker
 
 
 def get_xml_tag_parser(tag):
@@ -10,10 +11,15 @@ def get_xml_tag_parser(tag):
         "file": parse_file,
         "checker": parse_checker,
         "testlib_checker": parse_testlib_checker,
+        "exact_checker": parse_exact_checker,
+        "token_checker": parse_token_checker,
+        "double_checker": parse_double_checker,
         "test_data": parse_test_data,
         "test": parse_test,
         "testset": parse_testset,
         "icpc_testset": parse_icpc_testset,
+        "group": parse_group,
+        "ioi_testset": parse_ioi_testset,
         "limits": parse_limits,
     }
     return conversion[tag]
@@ -35,11 +41,23 @@ def parse_testlib_checker(node, path):
     return TestlibChecker(main_file, *other_files)
 
 
+def parse_exact_checker(node, path):
+    return ExactChecker()
+
+
+def parse_token_checker(node, path):
+    return TokenChecker()
+
+
+def parse_double_checker(node, path):
+    return DoubleChecker(float(node.attrib.get("epsilon", "1e-6")))
+
+
 def parse_test_data(node, path):
     if list(node):
         file = list(node)[0]
-        return open(parse_file(file, path), mode='r')
-    return io.StringIO(node.text)
+        return LazyFile(parse_file(file, path))
+    return LazyText(node.text or "")
 
 
 def parse_test(node, path):
@@ -47,15 +65,32 @@ def parse_test(node, path):
     return Test(int(node.attrib["number"]), input_data, output_data)
 
 
-def parse_testset(node, path):
-    tests = list(map(lambda child: parse_test(child, path), list(node)))
+def parse_testset(node, path, tests=None):
+    if tests is None:
+        tests = list(map(lambda child: parse_test(child, path), list(node)))
     return TestSet(tests)
 
 
-def parse_icpc_testset(node, path):
-    tests = list(map(lambda child: parse_test(child, path), list(node)))
+def parse_icpc_testset(node, path, tests=None):
+    if tests is None:
+        tests = list(map(lambda child: parse_test(child, path), list(node)))
     return ICPCTestSet(tests)
 
 
+def parse_group(node, path):
+    tests = list(map(lambda child: parse_test(child, path), list(node)))
+    depends = node.attrib.get("depends", "").split()
+    return TestGroup(node.attrib["name"], int(node.attrib.get("points", 0)), tests, depends)
+
+
+def parse_ioi_testset(node, path, groups=None):
+    if groups is None:
+        groups = list(map(lambda child: parse_group(child, path), list(node)))
+    return IOITestSet(groups)
+
+
 def parse_limits(node, path):
-    return Limits(int(node.attrib["time_ms"]), int(node.attrib["memory_kb"]), int(node.attrib["real_time_ms"]))
+    output_kb = int(node.attrib["output_kb"]) if "output_kb" in node.attrib else None
+    return Limits(
+        int(node.attrib["time_ms"]), int(node.attrib["memory_kb"]), int(node.attrib["real_time_ms"]), output_kb
+    )
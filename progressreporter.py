@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+
+
+class SubmissionProgress:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = None
+        self.last_sent = 0.0
+        self.active = True
+
+
+class ProgressReporter:
+    def __init__(self, send, interval=1.0):
+        self.send = send
+        self.interval = interval
+        self.condition = threading.Condition()
+        self.submissions = dict()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="progress-reporter", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+
+    def begin(self, submission_id):
+        with self.condition:
+            self.submissions[submission_id] = SubmissionProgress()
+
+    def update(self, submission_id, verdict):
+        with self.condition:
+            progress = self.submissions.get(submission_id)
+            if progress is None:
+                return
+            progress.pending = verdict
+            self.condition.notify()
+
+    def finish(self, submission_id, verdict):
+        with self.condition:
+            progress = self.submissions.pop(submission_id, None) or SubmissionProgress()
+            progress.active = False
+            progress.pending = None
+        with progress.lock:
+            self.send(submission_id, verdict)
+
+    def next_due(self):
+        now = time.monotonic()
+        timeout = None
+        for submission_id, progress in self.submissions.items():
+            if progress.pending is None:
+                continue
+            wait = progress.last_sent + self.interval - now
+            if wait <= 0:
+                return submission_id, progress, None
+            timeout = wait if timeout is None else min(timeout, wait)
+        return None, None, timeout
+
+    def run(self):
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                submission_id, progress, timeout = self.next_due()
+                if progress is None:
+                    self.condition.wait(timeout)
+                    continue
+                verdict, progress.pending = progress.pending, None
+                progress.last_sent = time.monotonic()
+            with progress.lock:
+                if not progress.active:
+                    continue
+                try:
+                    self.send(submission_id, verdict)
+                except Exception as ex:
+                    logging.warning(f"Failed to report progress of {submission_id}: {ex}")
@@ -0,0 +1,90 @@
+import functools
+import hashlib
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import threading
+import uuid
+from typing import Iterable
+
+
+def install_file(source: str, destination: str) -> None:
+    temporary_path = f"{destination}.{uuid.uuid4().hex}"
+    try:
+        os.link(source, temporary_path)
+    except OSError:
+        shutil.copyfile(source, temporary_path)
+    os.replace(temporary_path, destination)
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(compiler: str) -> str:
+    try:
+        result = subprocess.run([compiler, "--version"], capture_output=True, text=True, timeout=10)
+        return result.stdout + result.stderr
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+class ArtifactCache:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self.sizes = {name: os.stat(os.path.join(self.path, name)).st_size for name in os.listdir(self.path)}
+
+    def compiler_version(self, command: str) -> str:
+        return compiler_version(shlex.split(command)[0])
+
+    def key(self, files: Iterable[str], command: str) -> str:
+        digest = hashlib.sha256()
+        for file in files:
+            digest.update(os.path.basename(file).encode())
+            with open(file, mode='rb') as source:
+                for chunk in iter(lambda: source.read(1 << 20), b''):
+                    digest.update(chunk)
+        digest.update(command.encode())
+        digest.update(self.compiler_version(command).encode())
+        return digest.hexdigest()
+
+    def fetch(self, key: str, executable_path: str) -> bool:
+        artifact_path = os.path.join(self.path, key)
+        try:
+            os.utime(artifact_path)
+            install_file(artifact_path, executable_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key: str, executable_path: str) -> None:
+        install_file(executable_path, os.path.join(self.path, key))
+        with self.lock:
+            self.sizes[key] = os.stat(executable_path).st_size
+        self.evict()
+
+    def evict(self) -> None:
+        with self.lock:
+            total_size = sum(self.sizes.values())
+            if total_size <= self.max_bytes:
+                return
+            for key in sorted(self.sizes, key=lambda key: os.stat(os.path.join(self.path, key)).st_mtime):
+                if total_size <= self.max_bytes:
+                    break
+                logging.info(f"Evicting compiled artifact {key} from cache")
+                total_size -= self.sizes.pop(key)
+                os.remove(os.path.join(self.path, key))
+
+
+artifact_cache: ArtifactCache | None = None
+
+
+def set_artifact_cache(cache: ArtifactCache | None) -> None:
+    global artifact_cache
+    artifact_cache = cache
+
+
+def get_artifact_cache() -> ArtifactCache | None:
+    return artifact_cache
@@ -1,44 +1,249 @@
+import functools
 import logging
 import os
+import shlex
 import shutil
+import signal
+import stat
 import subprocess
-from typing import Dict, Iterable, IO
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, IO, List, Sequence, Tuple
 
+from strategy.errors import CancelledError
+from strategy.events import phase
+from strategy.files import copy_to_path, copy_to_stream, link_or_copy
 from strategy.metrics import Metrics, Limits
+from strategy.pool import ResourcePool
+
+ISOLATE_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+STATUSES = {"RE": "re", "SG": "ml", "TO": "tl", "XX": "cf"}
+FILES_DIRECTORY = "files"
+READABLE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+_context = threading.local()
+box_pool: ResourcePool | None = None
+
+
+def set_box_pool(pool: ResourcePool | None) -> None:
+    global box_pool
+    box_pool = pool
+
+
+def get_box_pool() -> ResourcePool | None:
+    return box_pool
+
+
+def current_box_id() -> int:
+    return getattr(_context, "box_id", 0)
+
+
+@contextmanager
+def use_box_id(box_id: int):
+    previous = getattr(_context, "box_id", None)
+    _context.box_id = box_id
+    try:
+        yield box_id
+    finally:
+        if previous is None:
+            del _context.box_id
+        else:
+            _context.box_id = previous
+
+
+@contextmanager
+def use_cancel_event(event: threading.Event):
+    previous = getattr(_context, "cancel_event", None)
+    _context.cancel_event = event
+    try:
+        yield event
+    finally:
+        _context.cancel_event = previous
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_executable(name: str, search_path: str | None) -> str:
+    return shutil.which(name, path=search_path) or name
+
+
+def isolate_argv(box_id: int, *options: str) -> List[str]:
+    return [resolve_executable("isolate", os.environ.get("PATH")), f"--box-id={box_id}", *options]
+
+
+def command_argv(command: str | Sequence[str]) -> List[str]:
+    return shlex.split(command) if isinstance(command, str) else list(command)
+
+
+def spawn(argv: Sequence[str], **kwargs) -> subprocess.Popen:
+    return subprocess.Popen(argv, close_fds=False, **kwargs)
+
+
+def run_cancellable(argv: Sequence[str]) -> int:
+    process = spawn(argv)
+    cancel_event = getattr(_context, "cancel_event", None)
+    if cancel_event is None:
+        return process.wait()
+    while True:
+        try:
+            return process.wait(timeout=0.01)
+        except subprocess.TimeoutExpired:
+            if cancel_event.is_set():
+                process.terminate()
+                process.wait()
+                raise CancelledError()
+
+
+def current_session() -> "BoxSession | None":
+    return getattr(_context, "session", None)
+
+
+@contextmanager
+def use_session(session: "BoxSession"):
+    previous = current_session()
+    _context.session = session
+    try:
+        yield session
+    finally:
+        _context.session = previous
+
+
+@contextmanager
+def box_session(box_id: int | None = None):
+    session = BoxSession(current_box_id() if box_id is None else box_id)
+    try:
+        with use_session(session):
+            yield session
+    finally:
+        session.close()
+
+
+def remove_path(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def files_path(box_path: str) -> str:
+    return os.path.join(os.path.dirname(box_path), FILES_DIRECTORY)
+
+
+def init_isolate_box(box_id: int) -> str:
+    with phase("isolate_setup"):
+        spawn(isolate_argv(box_id, "--cleanup")).wait()
+        with spawn(isolate_argv(box_id, "--init"), stdout=subprocess.PIPE, text=True) as process:
+            box_root = process.stdout.read()
+    return os.path.join(box_root.strip(), 'box')
+
+
+def cleanup_isolate_box(box_id: int) -> None:
+    spawn(isolate_argv(box_id, "--cleanup")).wait()
+
+
+class BoxSession:
+    def __init__(self, box_id: int):
+        self.box_id = box_id
+        self.box_path = None
+
+    def open(self, files: Dict[str, str]) -> str:
+        if self.box_path is None:
+            self.box_path = init_isolate_box(self.box_id)
+        else:
+            with phase("isolate_setup"):
+                self.reset(files)
+        return self.box_path
+
+    def reset(self, files: Dict[str, str]) -> None:
+        for entry in os.scandir(self.box_path):
+            remove_path(entry.path)
+        staged_path = files_path(self.box_path)
+        if os.path.isdir(staged_path):
+            for entry in os.scandir(staged_path):
+                if entry.name in files:
+                    file_stat = os.stat(files[entry.name])
+                    entry_stat = entry.stat(follow_symlinks=False)
+                    if (file_stat.st_dev, file_stat.st_ino) == (entry_stat.st_dev, entry_stat.st_ino):
+                        continue
+                remove_path(entry.path)
+        tmp_path = os.path.join(os.path.dirname(self.box_path), 'tmp')
+        if os.path.isdir(tmp_path):
+            for entry in os.scandir(tmp_path):
+                remove_path(entry.path)
+
+    def close(self) -> None:
+        if self.box_path is not None:
+            cleanup_isolate_box(self.box_id)
+            self.box_path = None
 
 
 class Box:
-    def __init__(self, files: Iterable[str] = iter([])):
-        self.files = files
+    def __init__(self,
+                 files: Iterable[str | Tuple[str, str]] = iter([]),
+                 box_id: int | None = None,
+                 dirs: Iterable[str] = ()):
+        self.files = dict()
+        for file in files:
+            path, name = file if isinstance(file, tuple) else (file, os.path.basename(file))
+            self.files[name] = path
+        self.box_id = current_box_id() if box_id is None else box_id
+        self.dirs = list(dirs)
         self.box_path = None
+        self.session = None
 
     def __enter__(self):
-        subprocess.run("isolate --cleanup", shell=True)
-        isolate_init_result = subprocess.run("isolate --init", capture_output=True, text=True, shell=True)
-        self.box_path = os.path.join(isolate_init_result.stdout.strip(), 'box')
+        session = current_session()
+        if session is not None and session.box_id == self.box_id:
+            self.session = session
+            self.box_path = session.open(self.files)
+        else:
+            self.box_path = init_isolate_box(self.box_id)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        subprocess.run("isolate --cleanup", shell=True)
+        if self.session is None:
+            cleanup_isolate_box(self.box_id)
+
+    def staged_path(self, name: str) -> str:
+        return os.path.join(files_path(self.box_path), name)
+
+    def expose(self, name: str) -> None:
+        mode = os.stat(self.staged_path(name)).st_mode
+        if mode & READABLE != READABLE:
+            os.chmod(self.staged_path(name), mode | READABLE)
+        link_path = os.path.join(self.box_path, name)
+        if not os.path.lexists(link_path):
+            os.symlink(os.path.join(os.pardir, FILES_DIRECTORY, name), link_path)
 
     def init_stdin(self, stdin: IO[str] | None) -> None:
-        data_in_path = os.path.join(self.box_path, "__data.in")
+        os.makedirs(files_path(self.box_path), exist_ok=True)
+        data_in_path = self.staged_path("__data.in")
+        if os.path.lexists(data_in_path):
+            os.remove(data_in_path)
         if stdin is None:
             open(data_in_path, mode='w').close()
         else:
-            with open(data_in_path, mode='w') as data_in:
-                data_in.write(stdin.read())
+            copy_to_path(stdin, data_in_path)
+        self.expose("__data.in")
 
     def write_stdout(self, stdout: IO[str] | None) -> None:
         data_out_path = os.path.join(self.box_path, "__data.out")
         if stdout is None:
             return
-        with open(data_out_path, mode='r') as data_out:
-            stdout.write(data_out.read())
+        copy_to_stream(data_out_path, stdout)
+
+    def read_outputs(self, outputs: Dict[str, str]) -> None:
+        for name, path in outputs.items():
+            output_path = os.path.join(self.box_path, name)
+            if os.path.isfile(output_path) and not os.path.islink(output_path):
+                shutil.copyfile(output_path, path)
 
     def init_files(self) -> None:
-        for file in self.files:
-            os.link(file, os.path.join(self.box_path, os.path.basename(file)))
+        os.makedirs(files_path(self.box_path), exist_ok=True)
+        for name, file in self.files.items():
+            if not os.path.exists(self.staged_path(name)):
+                link_or_copy(file, self.staged_path(name))
+            self.expose(name)
 
     @staticmethod
     def parse_meta_properties(meta_properties: Dict) -> Metrics:
@@ -47,62 +252,76 @@ class Box:
         memory_kb = int(meta_properties['max-rss'])
         status = "ok"
         if 'status' in meta_properties:
-            status = {"RE": "re", "SG": "ml", "TO": "tl", "XX": "cf"}[meta_properties["status"]]
+            status = STATUSES[meta_properties["status"]]
+        if meta_properties.get('exitsig') == str(int(signal.SIGXFSZ)):
+            status = "ol"
         return Metrics(time_ms, memory_kb, real_time_ms, status)
 
-    def execute_isolate(self, command: str, limits: Limits) -> Metrics:
-        meta_path = os.path.join(self.box_path, "__test.meta")
+    @staticmethod
+    def read_meta(meta_path: str) -> Dict[str, str]:
+        meta_properties = dict()
+        with open(meta_path, mode='r') as meta_file_stream:
+            for line in meta_file_stream.read().splitlines():
+                key, _, value = line.partition(':')
+                meta_properties[key] = value.strip()
+        return meta_properties
 
-        subprocess.run(
-            f"isolate --run --stdin=__data.in "
-            f"--stdout=__data.out "
-            f"--time={limits.time_ms / 1000} "
-            f"--mem={limits.memory_kb} "
-            f"--wall-time={limits.real_time_ms / 1000} "
-            f"--extra-time=1 "
-            f"--meta={meta_path} " +
-            f"-E PATH=\"/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin\" " +
-            f"-p " +
-            f"-- " +
-            f"{command}",
-            shell=True,
-        )
+    def execute_isolate(self, command: str | Sequence[str], limits: Limits) -> Metrics:
+        meta_path = os.path.join(self.box_path, "__test.meta")
 
-        with open(meta_path, mode='r') as meta_file_stream:
-            meta_properties = dict()
-            for line in meta_file_stream.readlines():
-                meta_properties[line.split(':')[0]] = line.split(':')[1].strip()
+        run_cancellable(isolate_argv(
+            self.box_id,
+            "--run",
+            "--stdin=__data.in",
+            "--stdout=__data.out",
+            f"--time={limits.time_ms / 1000}",
+            f"--mem={limits.memory_kb}",
+            f"--wall-time={limits.real_time_ms / 1000}",
+            "--extra-time=1",
+            *([f"--fsize={limits.output_kb + 1}"] if limits.output_kb is not None else []),
+            f"--meta={meta_path}",
+            "-E", f"PATH={ISOLATE_PATH}",
+            f"--dir=/{FILES_DIRECTORY}={files_path(self.box_path)}",
+            *(f"--dir={directory}" for directory in self.dirs),
+            "-p",
+            "--",
+            *command_argv(command),
+        ))
 
-        return self.parse_meta_properties(meta_properties)
+        metrics = self.parse_meta_properties(self.read_meta(meta_path))
+        data_out_path = os.path.join(self.box_path, "__data.out")
+        if limits.output_kb is not None and metrics.status != "ol" and os.path.exists(data_out_path):
+            if os.path.getsize(data_out_path) > limits.output_kb * 1024:
+                metrics.status = "ol"
+        if metrics.status == "ol" and os.path.exists(data_out_path):
+            os.remove(data_out_path)
+        return metrics
 
-    def run(self, command: str, stdin: IO[str] | None, stdout: IO[str] | None, limits: Limits) -> Metrics:
+    def run(self, command: str | Sequence[str], stdin: IO[str] | None, stdout: IO[str] | None, limits: Limits) -> Metrics:
         if self.box_path is None:
             raise EnvironmentError()
         self.init_stdin(stdin)
         self.init_files()
         metrics = self.execute_isolate(command, limits)
-        self.write_stdout(stdout)
+        if metrics.status != "ol":
+            self.write_stdout(stdout)
         return metrics
 
 
 class TrustedBox(Box):
     def __enter__(self):
-        self.box_path = os.path.join(os.path.curdir, "__strategy_temp")
+        self.box_path = os.path.join(tempfile.mkdtemp(prefix="__strategy_temp", dir=os.path.curdir), 'box')
         os.mkdir(self.box_path)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        shutil.rmtree(self.box_path)
-
-    def execute(self, command: str) -> int:
-        process = subprocess.run(
-            f"{command}",
-            shell=True,
-            cwd=self.box_path,
-        )
+        shutil.rmtree(os.path.dirname(self.box_path))
+
+    def execute(self, command: str | Sequence[str]) -> int:
+        process = subprocess.run(command_argv(command), cwd=self.box_path)
         return process.returncode
 
-    def run(self, command: str, stdin: IO[str] | None, stdout: IO[str] | None, limits: Limits | None = None) -> int:
+    def run(self, command: str | Sequence[str], stdin: IO[str] | None, stdout: IO[str] | None, limits: Limits | None = None) -> int:
         if self.box_path is None:
             raise EnvironmentError()
         if limits is not None:
@@ -1,13 +1,15 @@
-import os.path
-import tempfile
 from typing import IO
-from tempfile import TemporaryFile, NamedTemporaryFile
+from tempfile import NamedTemporaryFile
 
+from strategy.events import phase
 from strategy.executable import Executable
-from strategy.metrics import Limits
+from strategy.files import stream_as_path
+from strategy.metrics import Limits, Metrics
 from strategy.test import Test
 from strategy.verdicts import TestVerdict
 
+JUDGEMENT_MESSAGE_LIMIT = 64 * 1024
+
 
 class CheckerJudgement:
     def __init__(self, status: str, message: str = ""):
@@ -19,57 +21,54 @@ class CheckerJudgement:
 
 
 class Checker(Executable):
-    def __init__(self, main_file, *args):
-        super().__init__(main_file, *args)
+    def __init__(self, main_file, *files):
+        super().__init__(main_file, files)
 
     def check(self, input: IO[str], output: IO[str], answer: IO[str]) -> CheckerJudgement:
         with (
-            NamedTemporaryFile(mode='w') as input_file,
-            NamedTemporaryFile(mode='w') as output_file,
-            NamedTemporaryFile(mode='w') as answer_file,
-            NamedTemporaryFile(mode='r') as judgement_file,
+            stream_as_path(input) as input_path,
+            stream_as_path(output) as output_path,
+            stream_as_path(answer) as answer_path,
         ):
-            input_file.write(input.read())
-            output_file.write(output.read())
-            answer_file.write(answer.read())
+            return self.check_files(input_path, output_path, answer_path)
+
+    def check_files(self, input_path: str, output_path: str, answer_path: str) -> CheckerJudgement:
+        with NamedTemporaryFile(mode='r') as judgement_file:
+            names = ["__input", "__output", "__answer", "__judgement"]
             metrics = self(
-                files=[input_file.name, output_file.name, answer_file.name, judgement_file.name],
-                args=[os.path.basename(path) for path in [input_file.name, output_file.name, answer_file.name, judgement_file.name]],
+                files=zip([input_path, output_path, answer_path], names),
+                args=names,
+                outputs={"__judgement": judgement_file.name},
             )
-            judgement_file_contents = judgement_file.read()
-            judgement_properties = dict()
-            for line in judgement_file_contents.strip().split('\n'):
-                judgement_properties[line.split(': ')[0]] = line.split(': ')[1]
+            return self.read_judgement(metrics, judgement_file)
+
+    def read_judgement(self, metrics: Metrics, judgement_file: IO[str]) -> CheckerJudgement:
+        judgement_properties = dict()
+        for line in judgement_file:
+            key, separator, value = line.rstrip('\n').partition(': ')
+            if separator:
+                judgement_properties[key] = value
         return CheckerJudgement(judgement_properties["status"].lower())
 
     def eval(self, submission: Executable, test: Test, limits: Limits) -> None:
-        with tempfile.NamedTemporaryFile() as tmp:
-            with open(tmp.name, mode='w') as output_file_write:
+        with NamedTemporaryFile() as tmp:
+            with phase("solution_run") as labels, open(tmp.name, mode='w') as output_file_write:
                 runtime_metrics = submission(stdin=test.input, stdout=output_file_write, limits=limits)
+                labels["outcome"] = runtime_metrics.status
             if not runtime_metrics.is_ok():
                 test.verdict = TestVerdict(runtime_metrics.status, runtime_metrics)
                 return
-            with open(tmp.name, mode='r') as output_file_read:
-                judgement = self.check(test.input, output_file_read, test.answer)
-                test.verdict = TestVerdict(judgement.status, runtime_metrics)
+            with (
+                phase("checker_run") as labels,
+                stream_as_path(test.input) as input_path,
+                stream_as_path(test.answer) as answer_path,
+            ):
+                judgement = self.check_files(input_path, tmp.name, answer_path)
+                labels["outcome"] = judgement.status
+            test.verdict = TestVerdict(judgement.status, runtime_metrics)
 
 
 class TestlibChecker(Checker):
-    def check(self, input: IO[str], output: IO[str], answer: IO[str]) -> CheckerJudgement:
-        with (
-            NamedTemporaryFile(mode='w') as input_file,
-            NamedTemporaryFile(mode='w') as output_file,
-            NamedTemporaryFile(mode='w') as answer_file,
-            NamedTemporaryFile(mode='r') as judgement_file,
-        ):
-            input_file.write(input.read())
-            output_file.write(output.read())
-            answer_file.write(answer.read())
-            metrics = self(
-                files=[input_file.name, output_file.name, answer_file.name, judgement_file.name],
-                args=[os.path.basename(path) for path in
-                      [input_file.name, output_file.name, answer_file.name, judgement_file.name]],
-            )
-            judgement_file_contents = judgement_file.read()
-            status = "ok" if metrics.is_ok() else "wa"
-        return CheckerJudgement(status, judgement_file_contents)
+    def read_judgement(self, metrics: Metrics, judgement_file: IO[str]) -> CheckerJudgement:
+        status = "ok" if metrics.is_ok() else "wa"
+        return CheckerJudgement(status, judgement_file.read(JUDGEMENT_MESSAGE_LIMIT))
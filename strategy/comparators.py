@@ -0,0 +1,196 @@
+import math
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from strategy.checker import Checker, CheckerJudgement
+from strategy.files import CHUNK_SIZE
+
+WHITESPACE = re.compile(rb'\s')
+NEWLINE = re.compile(rb'\n')
+NUMBER = re.compile(rb'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+
+@contextmanager
+def mapped_file(path: str):
+    with open(path, mode='rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def iter_chunks(data, separator: re.Pattern = WHITESPACE, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    start = 0
+    while start < len(data):
+        end = start + chunk_size
+        if end < len(data):
+            match = separator.search(data, end)
+            end = match.end() if match is not None else len(data)
+        yield data[start:end]
+        start = end
+
+
+def iter_token_lists(data, chunk_size: int = CHUNK_SIZE) -> Iterator[List[bytes]]:
+    for chunk in iter_chunks(data, WHITESPACE, chunk_size):
+        tokens = chunk.split()
+        if tokens:
+            yield tokens
+
+
+def differing_tokens(answer, output,
+                     chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, bytes | None, bytes | None]]:
+    expected_lists, found_lists = iter_token_lists(answer, chunk_size), iter_token_lists(output, chunk_size)
+    expected, found = [], []
+    compared = 0
+    while True:
+        expected = expected or next(expected_lists, [])
+        found = found or next(found_lists, [])
+        if not expected or not found:
+            break
+        size = min(len(expected), len(found))
+        if expected[:size] != found[:size]:
+            for index in range(size):
+                if expected[index] != found[index]:
+                    yield compared + index + 1, expected[index], found[index]
+        compared += size
+        expected, found = expected[size:], found[size:]
+    if expected or found:
+        yield compared + 1, expected[0] if expected else None, found[0] if found else None
+    else:
+        yield compared, None, None
+
+
+def iter_lines(data, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    for chunk in iter_chunks(data, NEWLINE, chunk_size):
+        lines = chunk.split(b'\n')
+        if chunk.endswith(b'\n'):
+            lines.pop()
+        for line in lines:
+            yield line[:-1] if line.endswith(b'\r') else line
+
+
+def data_equal(first, second, chunk_size: int = CHUNK_SIZE) -> bool:
+    if len(first) != len(second):
+        return False
+    for start in range(0, len(first), chunk_size):
+        if first[start:start + chunk_size] != second[start:start + chunk_size]:
+            return False
+    return True
+
+
+def english_ending(number: int) -> str:
+    if number % 100 // 10 == 1:
+        return "th"
+    return {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+
+
+def compress(value: bytes) -> str:
+    text = value.decode(errors='replace')
+    if len(text) <= 64:
+        return text
+    return f"{text[:30]}...{text[-31:]}"
+
+
+def double_compare(expected: float, result: float, max_error: float) -> bool:
+    if math.isnan(expected):
+        return math.isnan(result)
+    if math.isinf(expected):
+        return expected == result
+    if math.isnan(result) or math.isinf(result):
+        return False
+    if abs(result - expected) <= max_error + 1e-15:
+        return True
+    bounds = (expected * (1.0 - max_error), expected * (1.0 + max_error))
+    return min(bounds) <= result + 1e-15 and result <= max(bounds) + 1e-15
+
+
+def double_delta(expected: float, result: float) -> float:
+    absolute = abs(result - expected)
+    if abs(expected) > 1e-9:
+        return min(absolute, abs(absolute / expected))
+    return absolute
+
+
+class BuiltinChecker(Checker):
+    def __init__(self):
+        self.main_file = None
+        self.files = []
+
+    def check_files(self, input_path: str, output_path: str, answer_path: str) -> CheckerJudgement:
+        with mapped_file(output_path) as output, mapped_file(answer_path) as answer:
+            return self.compare(output, answer)
+
+    def compare(self, output, answer) -> CheckerJudgement:
+        raise NotImplementedError()
+
+
+class ExactChecker(BuiltinChecker):
+    def compare(self, output, answer) -> CheckerJudgement:
+        if data_equal(output, answer):
+            lines = sum(chunk.count(b'\n') for chunk in iter_chunks(answer, NEWLINE))
+            lines += int(len(answer) > 0 and answer[-1:] != b'\n')
+            return CheckerJudgement("ok", f"{lines} lines")
+        output_lines = iter_lines(output)
+        number = 0
+        for expected in iter_lines(answer):
+            found = next(output_lines, None)
+            number += 1
+            if found is None:
+                if not expected.strip():
+                    continue
+                return CheckerJudgement("pe", "Unexpected end of file - line expected")
+            if found != expected:
+                return CheckerJudgement(
+                    "wa",
+                    f"{number}{english_ending(number)} lines differ - "
+                    f"expected: '{compress(expected)}', found: '{compress(found)}'"
+                )
+        if any(line.strip() for line in output_lines):
+            return CheckerJudgement("pe", "Extra information in the output file")
+        return CheckerJudgement("ok", f"{number} lines")
+
+
+class TokenChecker(BuiltinChecker):
+    def compare(self, output, answer) -> CheckerJudgement:
+        number, expected, found = next(differing_tokens(answer, output))
+        if expected is None and found is None:
+            return CheckerJudgement("ok", f"{number} tokens")
+        if expected is None:
+            return CheckerJudgement("wa", "Participant output contains extra tokens")
+        if found is None:
+            return CheckerJudgement("wa", "Unexpected EOF in the participants output")
+        return CheckerJudgement(
+            "wa",
+            f"{number}{english_ending(number)} words differ - "
+            f"expected: '{compress(expected)}', found: '{compress(found)}'"
+        )
+
+
+class DoubleChecker(BuiltinChecker):
+    def __init__(self, epsilon: float = 1e-6):
+        super().__init__()
+        self.epsilon = epsilon
+        self.precision = 6 if epsilon >= 1e-6 else 10
+
+    def compare(self, output, answer) -> CheckerJudgement:
+        for number, expected_token, found_token in differing_tokens(answer, output):
+            if expected_token is None and found_token is None:
+                return CheckerJudgement("ok", f"{number} numbers")
+            if expected_token is None:
+                return CheckerJudgement("pe", "Extra information in the output file")
+            if found_token is None:
+                return CheckerJudgement("pe", "Unexpected end of file - double expected")
+            if NUMBER.fullmatch(found_token) is None:
+                return CheckerJudgement("pe", f"Expected double, but \"{compress(found_token)}\" found")
+            expected, found = float(expected_token), float(found_token)
+            if not double_compare(expected, found, self.epsilon):
+                return CheckerJudgement(
+                    "wa",
+                    f"{number}{english_ending(number)} numbers differ - "
+                    f"expected: '{expected:.{self.precision}f}', found: '{found:.{self.precision}f}', "
+                    f"error = '{double_delta(expected, found):.{self.precision}f}'"
+                )
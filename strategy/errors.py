@@ -8,3 +8,7 @@ class CompileError(NovocodeError):
 
 class NoVerdictError(NovocodeError):
     pass
+
+
+class CancelledError(NovocodeError):
+    pass
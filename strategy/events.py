@@ -0,0 +1,25 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+phase_listeners = list()
+
+
+def add_phase_listener(func: Callable[[str, float, Dict[str, str]], None]) -> None:
+    phase_listeners.append(func)
+
+
+def remove_phase_listener(func: Callable[[str, float, Dict[str, str]], None]) -> None:
+    phase_listeners.remove(func)
+
+
+@contextmanager
+def phase(name: str):
+    labels = dict()
+    start = time.monotonic()
+    try:
+        yield labels
+    finally:
+        elapsed = time.monotonic() - start
+        for func in phase_listeners:
+            func(name, elapsed, labels)
@@ -1,36 +1,70 @@
+import contextvars
+import hashlib
 import os
+import shlex
 import shutil
 import stat
 import subprocess
 import logging
-from typing import Iterable, IO
+from contextlib import contextmanager
+from typing import Dict, Iterable, IO, List, Tuple
 
-from strategy.box import Box, TrustedBox
+from strategy.artifactcache import get_artifact_cache
+from strategy.box import Box, TrustedBox, command_argv
 from strategy.errors import CompileError
+from strategy.events import phase
 from strategy.metrics import Limits
+from strategy.precompiledheaders import get_precompiled_headers
+
+build_directory: contextvars.ContextVar[str | None] = contextvars.ContextVar("build_directory", default=None)
+
+
+@contextmanager
+def use_build_directory(path: str):
+    token = build_directory.set(path)
+    try:
+        yield path
+    finally:
+        build_directory.reset(token)
+
+
+def default_executable_path(file: str) -> str:
+    directory = build_directory.get()
+    if directory is None:
+        return file + '.out'
+    digest = hashlib.sha256(os.path.abspath(file).encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{os.path.basename(file)}.{digest}.out")
 
 
 class Executable:
     def __init__(self, main_file: str, files: Iterable[str] = iter([]), run_command="{0} {1}"):
         self.main_file = main_file
         st = os.stat(self.main_file)
-        os.chmod(self.main_file, st.st_mode | stat.S_IEXEC)
-        self.files = files
+        os.chmod(self.main_file, st.st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        self.files = list(files)
         self.run_command = run_command
 
+    def format_command(self, args: Iterable[str]) -> str:
+        return self.run_command.format(
+            shlex.quote(os.path.basename(self.main_file)),
+            ' '.join(shlex.quote(arg) for arg in args)
+        )
+
     def __call__(self,
                  stdin: IO[str] | None = None,
                  stdout: IO[str] | None = None,
-                 files: Iterable[str] = iter([]),
+                 files: Iterable[str | Tuple[str, str]] = iter([]),
                  limits: Limits | None = Limits(15000, 512 * 1024, 30000),
-                 args: Iterable[str] = iter([])):
+                 args: Iterable[str] = iter([]),
+                 outputs: Dict[str, str] | None = None):
         with Box([self.main_file] + list(files) + list(self.files)) as box:
             metrics = box.run(
-                self.run_command.format(os.path.basename(self.main_file), ' '.join(args)),
+                self.format_command(args),
                 stdin,
                 stdout,
                 limits
             )
+            box.read_outputs(outputs or dict())
         return metrics
 
 
@@ -40,23 +74,42 @@ class Compilable:
         self.compile_command = compile_command
         self.run_command = run_command
 
+    def format_compile_command(self, executable_path: str) -> str:
+        return self.compile_command.format(
+            shlex.quote(os.path.basename(self.file)),
+            shlex.quote(os.path.basename(executable_path))
+        )
+
+    def prepare_compile_command(self, executable_path: str) -> Tuple[List[str], List[str]]:
+        argv = command_argv(self.format_compile_command(executable_path))
+        headers = get_precompiled_headers()
+        if headers is None:
+            return argv, []
+        return headers.prepare(argv)
+
     def compile(self, executable_path=None):
         if not self.compile_command:
             return Executable(self.file, run_command=self.run_command)
         if executable_path is None:
-            executable_path = self.file + '.out'
-        with (Box([self.file]) as box):
+            executable_path = default_executable_path(self.file)
+        cache = get_artifact_cache()
+        cache_key = cache.key([self.file], self.compile_command) if cache is not None else None
+        if cache is not None and cache.fetch(cache_key, executable_path):
+            return Executable(executable_path, run_command=self.run_command)
+        argv, dirs = self.prepare_compile_command(executable_path)
+        with phase("compilation") as labels, Box([self.file], dirs=dirs) as box:
+            labels["pch"] = "used" if dirs else "none"
             metrics = box.run(
-                self.compile_command.format(
-                    os.path.basename(self.file),
-                    os.path.basename(executable_path)
-                ),
+                argv,
                 None,
                 None,
                 Limits(15000, 512 * 1024, 30000))
+            labels["outcome"] = metrics.status
             shutil.copyfile(os.path.join(box.box_path, os.path.basename(executable_path)), executable_path)
         if metrics.status != 'ok':
             raise CompileError()
+        if cache is not None:
+            cache.store(cache_key, executable_path)
         return Executable(executable_path, run_command=self.run_command)
 
 
@@ -64,16 +117,18 @@ class TrustedExecutable(Executable):
     def __call__(self,
                  stdin: IO[str] | None = None,
                  stdout: IO[str] | None = None,
-                 files: Iterable[str] = iter([]),
+                 files: Iterable[str | Tuple[str, str]] = iter([]),
                  limits: Limits | None = None,
-                 args: Iterable[str] = iter([])):
+                 args: Iterable[str] = iter([]),
+                 outputs: Dict[str, str] | None = None):
         with TrustedBox([self.main_file] + list(files) + list(self.files)) as box:
             exitcode = box.run(
-                self.run_command.format(os.path.basename(self.main_file), ' '.join(args)),
+                self.format_command(args),
                 stdin,
                 stdout,
                 limits
             )
+            box.read_outputs(outputs or dict())
         return exitcode
 
 
@@ -82,16 +137,22 @@ class TrustedCompilable(Compilable):
         if not self.compile_command:
             return Executable(self.file, run_command=self.run_command)
         if executable_path is None:
-            executable_path = self.file + '.out'
-        with TrustedBox([self.file]) as box:
+            executable_path = default_executable_path(self.file)
+        cache = get_artifact_cache()
+        cache_key = cache.key([self.file], self.compile_command) if cache is not None else None
+        if cache is not None and cache.fetch(cache_key, executable_path):
+            return Executable(executable_path, run_command=self.run_command)
+        argv, dirs = self.prepare_compile_command(executable_path)
+        with phase("compilation") as labels, TrustedBox([self.file]) as box:
+            labels["pch"] = "used" if dirs else "none"
             exitcode = box.run(
-                self.compile_command.format(
-                    os.path.basename(self.file),
-                    os.path.basename(executable_path)
-                ),
+                argv,
                 None,
                 None)
+            labels["outcome"] = "ok" if exitcode == 0 else "ce"
             shutil.copyfile(os.path.join(box.box_path, os.path.basename(executable_path)), executable_path)
         if exitcode != 0:
             raise CompileError()
+        if cache is not None:
+            cache.store(cache_key, executable_path)
         return Executable(executable_path, run_command=self.run_command)
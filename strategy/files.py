@@ -0,0 +1,122 @@
+import io
+import os
+import shutil
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+from typing import IO
+
+CHUNK_SIZE = 1 << 20
+
+
+class LazyData:
+    def __init__(self):
+        self.stream = None
+
+    def open(self) -> IO:
+        raise NotImplementedError()
+
+    def get(self) -> IO:
+        if self.stream is None:
+            self.stream = self.open()
+        return self.stream
+
+    def release(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def __getattr__(self, item):
+        if item.startswith('__') or item == "stream":
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+    def __getstate__(self):
+        return dict(self.__dict__, stream=None)
+
+    def __iter__(self):
+        return iter(self.get())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class LazyFile(LazyData):
+    def __init__(self, path: str, mode: str = 'r'):
+        super().__init__()
+        self.name = path
+        self.mode = mode
+
+    def open(self) -> IO:
+        return open(self.name, mode=self.mode)
+
+
+class LazyText(LazyData):
+    def __init__(self, text: str):
+        super().__init__()
+        self.text = text
+
+    def open(self) -> IO:
+        return io.StringIO(self.text)
+
+
+def stream_path(stream: IO | None) -> str | None:
+    name = getattr(stream, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    return None
+
+
+def stream_fileno(stream: IO) -> int | None:
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def link_or_copy(source: str, destination: str) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy(source, destination)
+
+
+def copy_to_path(stream: IO, destination: str) -> None:
+    source = stream_path(stream)
+    if source is not None:
+        link_or_copy(source, destination)
+        return
+    if isinstance(stream, LazyText):
+        with open(destination, mode='w') as destination_file:
+            destination_file.write(stream.text)
+        return
+    mode = 'w' if isinstance(stream, io.TextIOBase) else 'wb'
+    with open(destination, mode=mode) as destination_file:
+        shutil.copyfileobj(stream, destination_file, CHUNK_SIZE)
+
+
+def copy_to_stream(source: str, stream: IO) -> None:
+    fileno = stream_fileno(stream)
+    if fileno is not None:
+        stream.flush()
+        with open(source, mode='rb') as source_file:
+            offset = 0
+            while sent := os.sendfile(fileno, source_file.fileno(), offset, CHUNK_SIZE):
+                offset += sent
+        return
+    mode = 'r' if isinstance(stream, io.TextIOBase) else 'rb'
+    with open(source, mode=mode) as source_file:
+        shutil.copyfileobj(source_file, stream, CHUNK_SIZE)
+
+
+@contextmanager
+def stream_as_path(stream: IO):
+    path = stream_path(stream)
+    if path is not None:
+        yield path
+        return
+    with NamedTemporaryFile() as file:
+        copy_to_path(stream, file.name)
+        yield file.name
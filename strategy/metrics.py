@@ -1,11 +1,16 @@
 class Limits:
-    def __init__(self, time_ms: int, memory_kb: int, real_time_ms: int):
+    __slots__ = ('time_ms', 'memory_kb', 'real_time_ms', 'output_kb')
+
+    def __init__(self, time_ms: int, memory_kb: int, real_time_ms: int, output_kb: int | None = None):
         self.time_ms = time_ms
         self.memory_kb = memory_kb
         self.real_time_ms = real_time_ms
+        self.output_kb = output_kb
 
 
 class Metrics:
+    __slots__ = ('time_ms', 'memory_kb', 'real_time_ms', 'status')
+
     def __init__(self, time_ms: int, memory_kb: int, real_time_ms: int, status: str):
         self.time_ms = time_ms
         self.memory_kb = memory_kb
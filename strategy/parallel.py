@@ -0,0 +1,117 @@
+import contextvars
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+from typing import Callable
+
+from strategy.box import (
+    box_session, current_box_id, current_session, get_box_pool, use_box_id, use_cancel_event, use_session
+)
+from strategy.pool import ResourcePool
+
+cpu_pool = ResourcePool(sorted(os.sched_getaffinity(0)))
+
+
+@contextmanager
+def pinned_to_cpu(cpu: int | None):
+    if cpu is None:
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, {cpu})
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+class TaskCancelEvent:
+    def __init__(self, lanes_cancelled: threading.Event):
+        self.lanes_cancelled = lanes_cancelled
+        self.cancelled = threading.Event()
+
+    def set(self) -> None:
+        self.cancelled.set()
+
+    def is_set(self) -> bool:
+        return self.cancelled.is_set() or self.lanes_cancelled.is_set()
+
+
+class SandboxLanes:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.tasks = queue.Queue()
+        self.threads = []
+        self.resources = ExitStack()
+        self.cancelled = threading.Event()
+        self.task_events = dict()
+
+    def __enter__(self):
+        box_ids = [current_box_id()]
+        pool = get_box_pool()
+        while pool is not None and len(box_ids) < self.workers:
+            box_id = pool.acquire(blocking=False)
+            if box_id is None:
+                break
+            self.resources.callback(pool.release, box_id)
+            box_ids.append(box_id)
+
+        for index, box_id in enumerate(box_ids):
+            cpu = cpu_pool.acquire(blocking=False)
+            if cpu is not None:
+                self.resources.callback(cpu_pool.release, cpu)
+            session = current_session() if index == 0 else None
+            thread = threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self.work, box_id, session, cpu),
+                name=f"lane-{box_id}",
+            )
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.cancel()
+        for thread in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.resources.close()
+
+    def work(self, box_id: int, session, cpu: int | None) -> None:
+        with ExitStack() as stack:
+            stack.enter_context(use_box_id(box_id))
+            stack.enter_context(use_session(session) if session is not None else box_session(box_id))
+            stack.enter_context(pinned_to_cpu(cpu))
+            while (task := self.tasks.get()) is not None:
+                future, func, args = task
+                cancel_event = self.task_events.get(future)
+                if cancel_event is None or cancel_event.is_set() or not future.set_running_or_notify_cancel():
+                    self.task_events.pop(future, None)
+                    continue
+                try:
+                    with use_cancel_event(cancel_event):
+                        future.set_result(func(*args))
+                except BaseException as ex:
+                    future.set_exception(ex)
+                finally:
+                    self.task_events.pop(future, None)
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def cancel_task(self, future: Future) -> None:
+        if future.cancel():
+            return
+        cancel_event = self.task_events.get(future)
+        if cancel_event is not None:
+            cancel_event.set()
+
+    def submit(self, func: Callable, *args) -> Future:
+        future = Future()
+        self.task_events[future] = TaskCancelEvent(self.cancelled)
+        self.tasks.put((future, func, args))
+        return future
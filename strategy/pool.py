@@ -0,0 +1,33 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+
+
+class ResourcePool:
+    def __init__(self, resources: Iterable):
+        self.free = list(resources)
+        self.capacity = len(self.free)
+        self.condition = threading.Condition()
+
+    def acquire(self, blocking: bool = True, timeout: float | None = None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.free, timeout if blocking else 0):
+                return None
+            return self.free.pop(0)
+
+    def release(self, resource) -> None:
+        with self.condition:
+            self.free.append(resource)
+            self.condition.notify()
+
+    @contextmanager
+    def lease(self):
+        resource = self.acquire()
+        try:
+            yield resource
+        finally:
+            self.release(resource)
+
+    def in_use(self) -> int:
+        with self.condition:
+            return self.capacity - len(self.free)
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+from collections import defaultdict
+from typing import List, Sequence, Tuple
+
+from strategy.artifactcache import compiler_version
+from strategy.events import phase
+
+PCH_HEADERS = ("bits/stdc++.h",)
+PCH_COMPILERS = ("g++", "c++", "clang++")
+
+
+def is_pch_compiler(compiler: str) -> bool:
+    name = os.path.basename(compiler)
+    return any(name == prefix or name.startswith(f"{prefix}-") for prefix in PCH_COMPILERS)
+
+
+def header_flags(argv: Sequence[str]) -> List[str]:
+    flags = []
+    arguments = iter(argv[1:])
+    for argument in arguments:
+        if argument == "-o":
+            next(arguments, None)
+        elif argument.startswith("-") and argument != "-c":
+            flags.append(argument)
+    return flags
+
+
+def locate_header(compiler: str, flags: Sequence[str], header: str) -> str:
+    result = subprocess.run(
+        [compiler, *flags, "-x", "c++", "-E", "-H", "-o", os.devnull, "-"],
+        input=f"#include <{header}>\n", capture_output=True, text=True, timeout=60, check=True,
+    )
+    for line in result.stderr.splitlines():
+        if line.startswith(". ") and line.endswith(header):
+            return line[2:]
+    raise FileNotFoundError(header)
+
+
+class PrecompiledHeaders:
+    def __init__(self, path: str, headers: Sequence[str] = PCH_HEADERS):
+        self.path = os.path.abspath(path)
+        self.headers = tuple(headers)
+        self.lock = threading.Lock()
+        self.locks = defaultdict(threading.Lock)
+        self.failed = set()
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, compiler: str, flags: Sequence[str]) -> str:
+        digest = hashlib.sha256()
+        for part in [compiler, compiler_version(compiler), *self.headers, *flags]:
+            digest.update(part.encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def build(self, compiler: str, flags: Sequence[str], pch_path: str) -> None:
+        temporary_path = f"{pch_path}.{uuid.uuid4().hex}"
+        try:
+            with phase("pch_build"):
+                for header in self.headers:
+                    header_path = locate_header(compiler, flags, header)
+                    output_path = os.path.join(temporary_path, f"{header}.gch")
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    subprocess.run(
+                        [compiler, *flags, "-x", "c++-header", header_path, "-o", output_path],
+                        capture_output=True, timeout=600, check=True,
+                    )
+            os.rename(temporary_path, pch_path)
+        finally:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+    def directory(self, argv: Sequence[str]) -> str | None:
+        if not argv or not is_pch_compiler(argv[0]):
+            return None
+        flags = header_flags(argv)
+        key = self.key(argv[0], flags)
+        pch_path = os.path.join(self.path, key)
+        if os.path.isdir(pch_path):
+            return pch_path
+        with self.lock:
+            if key in self.failed:
+                return None
+            key_lock = self.locks[key]
+        with key_lock:
+            if not os.path.isdir(pch_path):
+                try:
+                    self.build(argv[0], flags, pch_path)
+                except (OSError, subprocess.SubprocessError) as ex:
+                    logging.warning(f"Failed to build precompiled headers for {argv[0]} {flags}: {ex}")
+                    with self.lock:
+                        self.failed.add(key)
+                    return None
+        return pch_path
+
+    def prepare(self, argv: Sequence[str]) -> Tuple[List[str], List[str]]:
+        pch_path = self.directory(argv)
+        if pch_path is None:
+            return list(argv), []
+        return [argv[0], f"-I{pch_path}", *argv[1:]], [pch_path]
+
+
+precompiled_headers: PrecompiledHeaders | None = None
+
+
+def set_precompiled_headers(headers: PrecompiledHeaders | None) -> None:
+    global precompiled_headers
+    precompiled_headers = headers
+
+
+def get_precompiled_headers() -> PrecompiledHeaders | None:
+    return precompiled_headers
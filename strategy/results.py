@@ -0,0 +1,269 @@
+from array import array
+from collections.abc import Sequence
+from weakref import WeakValueDictionary
+
+from strategy.metrics import Metrics
+from strategy.verdicts import TestVerdict, Verdict
+
+EMPTY = -1
+CUSTOM = -2
+
+
+class TestResults:
+    __slots__ = (
+        'statuses', 'codes', 'status', 'metrics_status', 'time_ms', 'memory_kb', 'real_time_ms',
+        'custom', 'count', 'version', 'views',
+    )
+
+    def __init__(self, size: int):
+        self.statuses = []
+        self.codes = dict()
+        self.status = array('h', [EMPTY]) * size
+        self.metrics_status = array('h', [EMPTY]) * size
+        self.time_ms = array('q', [0]) * size
+        self.memory_kb = array('q', [0]) * size
+        self.real_time_ms = array('q', [0]) * size
+        self.custom = dict()
+        self.count = 0
+        self.version = 0
+        self.views = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.status)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != 'views'}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.views = WeakValueDictionary()
+
+    def code(self, status: str) -> int:
+        code = self.codes.get(status)
+        if code is None:
+            code = self.codes[status] = len(self.statuses)
+            self.statuses.append(status)
+        return code
+
+    def has(self, index: int) -> bool:
+        return self.status[index] != EMPTY
+
+    def is_ok(self, index: int) -> bool:
+        code = self.status[index]
+        if code == CUSTOM:
+            return self.custom[index].is_ok()
+        return code != EMPTY and self.statuses[code].lower() == "ok"
+
+    def get(self, index: int) -> Verdict | None:
+        code = self.status[index]
+        if code == EMPTY:
+            return None
+        if code == CUSTOM:
+            return self.custom[index]
+        view = self.views.get(index)
+        if view is None:
+            view = self.views[index] = StoredVerdict(self, index)
+        return view
+
+    def materialize(self, index: int) -> Verdict | None:
+        code = self.status[index]
+        if code == EMPTY:
+            return None
+        if code == CUSTOM:
+            return self.custom[index]
+        metrics = Metrics(
+            self.time_ms[index], self.memory_kb[index], self.real_time_ms[index],
+            self.statuses[self.metrics_status[index]],
+        )
+        return TestVerdict(self.statuses[code], metrics)
+
+    def update(self, index: int, name: str, value, metrics: bool = False) -> None:
+        verdict = self.materialize(index)
+        setattr(verdict.metrics if metrics else verdict, name, value)
+        if self.status[index] != CUSTOM:
+            self.store(index, verdict)
+
+    def set(self, index: int, verdict: Verdict | None) -> None:
+        view = self.views.get(index)
+        if verdict is not None and verdict is view:
+            return
+        if isinstance(verdict, StoredVerdict):
+            verdict = verdict.snapshot()
+        metrics = getattr(verdict, "metrics", None)
+        if isinstance(metrics, StoredMetrics):
+            verdict = TestVerdict(verdict.status, metrics.snapshot())
+        if view is not None:
+            del self.views[index]
+            view.detach()
+        self.store(index, verdict)
+
+    def store(self, index: int, verdict: Verdict | None) -> None:
+        metrics = getattr(verdict, "metrics", None)
+        self.count -= int(self.has(index))
+        self.custom.pop(index, None)
+        self.version += 1
+        if verdict is None:
+            self.status[index] = EMPTY
+            return
+        self.count += 1
+        if type(verdict) is TestVerdict and type(metrics) is Metrics:
+            try:
+                self.time_ms[index] = metrics.time_ms
+                self.memory_kb[index] = metrics.memory_kb
+                self.real_time_ms[index] = metrics.real_time_ms
+                self.metrics_status[index] = self.code(metrics.status)
+                self.status[index] = self.code(verdict.status)
+                return
+            except (TypeError, OverflowError):
+                pass
+        self.status[index] = CUSTOM
+        self.custom[index] = verdict
+
+    def view(self, start: int = 0, stop: int | None = None) -> "VerdictView":
+        return VerdictView(self, start, len(self) if stop is None else min(stop, len(self)))
+
+
+def metrics_column(name: str) -> property:
+    def get(self):
+        verdict = self.verdict
+        if verdict.detached is not None:
+            return getattr(verdict.detached.metrics, name)
+        results, index = verdict.results, verdict.index
+        if results.status[index] == CUSTOM:
+            return getattr(results.custom[index].metrics, name)
+        if name == "status":
+            return results.statuses[results.metrics_status[index]]
+        return getattr(results, name)[index]
+
+    def set(self, value):
+        verdict = self.verdict
+        if verdict.detached is not None:
+            setattr(verdict.detached.metrics, name, value)
+        else:
+            verdict.results.update(verdict.index, name, value, metrics=True)
+
+    return property(get, set)
+
+
+class StoredMetrics(Metrics):
+    __slots__ = ('verdict',)
+
+    def __init__(self, verdict: "StoredVerdict"):
+        self.verdict = verdict
+
+    time_ms = metrics_column("time_ms")
+    memory_kb = metrics_column("memory_kb")
+    real_time_ms = metrics_column("real_time_ms")
+    status = metrics_column("status")
+
+    def snapshot(self) -> Metrics:
+        return Metrics(self.time_ms, self.memory_kb, self.real_time_ms, self.status)
+
+    def __repr__(self):
+        return f"Metrics({self.time_ms}, {self.memory_kb}, {self.real_time_ms}, {self.status!r})"
+
+
+class StoredVerdict(TestVerdict):
+    __slots__ = ('results', 'index', 'detached', '__weakref__')
+
+    def __init__(self, results: TestResults, index: int):
+        self.results = results
+        self.index = index
+        self.detached = None
+
+    def snapshot(self) -> Verdict:
+        if self.detached is not None:
+            return self.detached
+        return self.results.materialize(self.index)
+
+    def detach(self) -> None:
+        self.detached = self.results.materialize(self.index)
+
+    @property
+    def status(self):
+        if self.detached is not None:
+            return self.detached.status
+        results = self.results
+        code = results.status[self.index]
+        if code == CUSTOM:
+            return results.custom[self.index].status
+        return results.statuses[code]
+
+    @status.setter
+    def status(self, value):
+        if self.detached is not None:
+            self.detached.status = value
+        else:
+            self.results.update(self.index, "status", value)
+
+    @property
+    def metrics(self):
+        if self.detached is not None:
+            return self.detached.metrics
+        if self.results.status[self.index] == CUSTOM:
+            return self.results.custom[self.index].metrics
+        return StoredMetrics(self)
+
+    @metrics.setter
+    def metrics(self, value):
+        if self.detached is not None:
+            self.detached.metrics = value
+        else:
+            self.results.update(self.index, "metrics", value)
+
+    def __repr__(self):
+        return f"TestVerdict({self.status!r}, {self.metrics!r})"
+
+
+class VerdictView(Sequence):
+    __slots__ = ('results', 'start', 'stop', 'indices', 'version')
+
+    def __init__(self, results: TestResults, start: int, stop: int):
+        self.results = results
+        self.start = start
+        self.stop = stop
+        self.indices = None
+        self.version = None
+
+    def positions(self):
+        results = self.results
+        if self.version != results.version:
+            if results.count == len(results):
+                self.indices = range(self.start, self.stop)
+            else:
+                status = results.status
+                self.indices = [index for index in range(self.start, self.stop) if status[index] != EMPTY]
+            self.version = results.version
+        return self.indices
+
+    def __len__(self):
+        return len(self.positions())
+
+    def __getitem__(self, item):
+        positions = self.positions()
+        if isinstance(item, slice):
+            return [self.results.get(index) for index in positions[item]]
+        return self.results.get(positions[item])
+
+    def __iter__(self):
+        for index in self.positions():
+            yield self.results.get(index)
+
+    def fields(self):
+        results = self.results
+        statuses = results.statuses
+        for index in self.positions():
+            code = results.status[index]
+            if code == CUSTOM:
+                verdict = results.custom[index]
+                metrics = verdict.metrics
+                yield verdict.status, metrics.time_ms, metrics.memory_kb, metrics.real_time_ms, metrics.status
+            else:
+                yield (
+                    statuses[code], results.time_ms[index], results.memory_kb[index], results.real_time_ms[index],
+                    statuses[results.metrics_status[index]],
+                )
+
+    def __repr__(self):
+        return f"VerdictView({list(self)!r})"
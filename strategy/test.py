@@ -1,30 +1,99 @@
-from typing import Sequence, IO, Callable
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Callable, Dict, IO, List, Sequence
 
 from strategy.errors import NoVerdictError
-from strategy.verdicts import TestVerdict, ICPCVerdict
+from strategy.files import LazyData
+from strategy.parallel import SandboxLanes
+from strategy.results import TestResults
+from strategy.verdicts import TestVerdict, ICPCVerdict, GroupVerdict, IOIVerdict
 
 
 class Test:
+    __slots__ = ('number', 'input', 'answer', 'results', 'index', 'own_verdict')
+
     def __init__(self, number: int, input: IO[str], answer: IO[str], verdict: TestVerdict | None = None):
         self.number = number
         self.input = input
         self.answer = answer
-        self.verdict = verdict
+        self.results = None
+        self.index = None
+        self.own_verdict = verdict
+
+    @property
+    def verdict(self) -> TestVerdict | None:
+        if self.results is None:
+            return self.own_verdict
+        return self.results.get(self.index)
+
+    @verdict.setter
+    def verdict(self, verdict: TestVerdict | None):
+        if self.results is None:
+            self.own_verdict = verdict
+        else:
+            self.results.set(self.index, verdict)
+
+    def attach(self, results: TestResults, index: int):
+        verdict = self.verdict
+        self.results = results
+        self.index = index
+        self.own_verdict = None
+        if verdict is not None:
+            results.set(index, verdict)
+
+    def release(self):
+        for data in (self.input, self.answer):
+            if isinstance(data, LazyData):
+                data.release()
+
+
+def run_detached(func: Callable[[Test], None], test: Test) -> TestVerdict | None:
+    detached_test = Test(test.number, test.input, test.answer)
+    try:
+        func(detached_test)
+    finally:
+        test.release()
+    return detached_test.verdict
 
 
 class TestSet:
     def __init__(self, tests: Sequence[Test]):
         self.tests = tests
+        self.results = TestResults(len(tests))
+        for index, test in enumerate(tests):
+            test.attach(self.results, index)
         self.on_next = list()
+        self.parallelism = 1
 
     def add_on_next(self, func: Callable[[int], None]):
         self.on_next.append(func)
 
+    def set_parallelism(self, parallelism: int):
+        self.parallelism = parallelism
+
+    def run(self, func: Callable[[Test], None], workers: int | None = None):
+        workers = self.parallelism if workers is None else workers
+        if workers <= 1:
+            for test in self:
+                func(test)
+            return
+        with SandboxLanes(workers) as lanes:
+            pending = [(test, lanes.submit(run_detached, func, test)) for test in self.tests]
+            for test, future in pending:
+                for on_next in self.on_next:
+                    on_next(test.number)
+                test.verdict = future.result()
+
     def __iter__(self):
         self.current_test = -1
         return self
 
+    def release_current(self):
+        if 0 <= self.current_test < len(self.tests):
+            self.tests[self.current_test].release()
+
     def __next__(self):
+        self.release_current()
         self.current_test += 1
         if self.current_test >= len(self.tests):
             raise StopIteration
@@ -33,21 +102,197 @@ class TestSet:
         return self.tests[self.current_test]
 
     def verdicts(self):
-        return [test.verdict for test in self.tests if test.verdict is not None]
+        return self.results.view()
 
 
 class ICPCTestSet(TestSet):
-    def __next__(self):
-        current_test = self.tests[self.current_test] if self.current_test >= 0 else None
-        if current_test is not None and current_test.verdict is None:
-            raise NoVerdictError()
-        if current_test is not None and not current_test.verdict.is_ok():
-            self.verdict = ICPCVerdict(current_test.verdict.status, self.verdicts(), current_test.number)
-            raise StopIteration
-        self.current_test += 1
-        if self.current_test >= len(self.tests):
-            self.verdict = ICPCVerdict("ok", self.verdicts())
-            raise StopIteration
-        for func in self.on_next:
-            func(self.tests[self.current_test].number)
-        return self.tests[self.current_test]
+    def __init__(self, tests: Sequence[Test]):
+        super().__init__(tests)
+        self.priorities = dict()
+        self.probes = 0
+
+    def set_priorities(self, priorities: Dict[int, float], probes: int):
+        self.priorities = priorities
+        self.probes = probes
+
+    def schedule(self) -> List[int]:
+        candidates = [index for index, test in enumerate(self.tests) if self.priorities.get(test.number, 0) > 0]
+        candidates.sort(key=lambda index: -self.priorities[self.tests[index].number])
+        probes = candidates[:self.probes]
+        probed = set(probes)
+        return probes + [index for index in range(len(self.tests)) if index not in probed]
+
+    def make_verdict(self, failed: int) -> ICPCVerdict:
+        if failed >= len(self.tests):
+            return ICPCVerdict("ok", self.verdicts())
+        confirmed = self.results.view(stop=failed + 1)
+        return ICPCVerdict(self.tests[failed].verdict.status, confirmed, self.tests[failed].number)
+
+    def run(self, func: Callable[[Test], None], workers: int | None = None):
+        workers = self.parallelism if workers is None else workers
+        if workers <= 1:
+            for test in self:
+                func(test)
+            return
+        order = self.schedule()
+        failed = len(self.tests)
+        with SandboxLanes(workers) as lanes:
+            pending = deque()
+            position = 0
+            while True:
+                while len(pending) < workers and position < len(order):
+                    if order[position] < failed:
+                        speculative_test = self.tests[order[position]]
+                        pending.append((order[position], lanes.submit(run_detached, func, speculative_test)))
+                    position += 1
+                if not pending:
+                    break
+                index, future = pending.popleft()
+                if index > failed:
+                    future.cancel()
+                    continue
+                test = self.tests[index]
+                for on_next in self.on_next:
+                    on_next(test.number)
+                test.verdict = future.result()
+                if not self.results.has(index):
+                    lanes.cancel()
+                    raise NoVerdictError()
+                if not self.results.is_ok(index):
+                    failed = index
+            lanes.cancel()
+        self.verdict = self.make_verdict(failed)
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self):
+        failed = len(self.tests)
+        for index in self.schedule():
+            if index > failed:
+                continue
+            test = self.tests[index]
+            for func in self.on_next:
+                func(test.number)
+            yield test
+            test.release()
+            if not self.results.has(index):
+                raise NoVerdictError()
+            if not self.results.is_ok(index):
+                failed = index
+        self.verdict = self.make_verdict(failed)
+
+
+class TestGroup:
+    def __init__(self, name: str, points: int, tests: Sequence[Test], depends: Sequence[str] = ()):
+        self.name = name
+        self.points = points
+        self.tests = tests
+        self.depends = list(depends)
+
+    def status(self) -> str | None:
+        for test in self.tests:
+            if test.verdict is not None and not test.verdict.is_ok():
+                return test.verdict.status
+        if all(test.verdict is not None for test in self.tests):
+            return "ok"
+        return None
+
+    def verdict(self, verdicts: Sequence[TestVerdict] | None = None) -> GroupVerdict:
+        if verdicts is None:
+            verdicts = [test.verdict for test in self.tests if test.verdict is not None]
+        for test in self.tests:
+            if test.verdict is not None and not test.verdict.is_ok():
+                return GroupVerdict(self.name, test.verdict.status, verdicts, 0, test.number)
+        if len(verdicts) < len(self.tests):
+            return GroupVerdict(self.name, "skipped", verdicts, 0)
+        return GroupVerdict(self.name, "ok", verdicts, self.points)
+
+
+class IOITestSet(TestSet):
+    def __init__(self, groups: Sequence[TestGroup]):
+        super().__init__([test for group in groups for test in group.tests])
+        self.groups = groups
+        self.groups_by_name = dict()
+        for group in groups:
+            for dependency in group.depends:
+                if dependency not in self.groups_by_name:
+                    raise ValueError(f"Group {group.name} depends on {dependency}, which is not declared before it")
+            self.groups_by_name[group.name] = group
+
+    def is_ready(self, group: TestGroup) -> bool:
+        return all(self.groups_by_name[dependency].status() == "ok" for dependency in group.depends)
+
+    def run(self, func: Callable[[Test], None], workers: int | None = None):
+        workers = self.parallelism if workers is None else workers
+        if workers <= 1:
+            for test in self:
+                func(test)
+            return
+        remaining = {group.name: deque(group.tests) for group in self.groups}
+        submitted = {group.name: deque() for group in self.groups}
+        with SandboxLanes(workers) as lanes:
+            while True:
+                in_flight = [
+                    future for pending in submitted.values() for _, future in pending if not future.done()
+                ]
+                for group in self.groups:
+                    if not remaining[group.name] or not self.is_ready(group):
+                        continue
+                    while len(in_flight) < workers and remaining[group.name]:
+                        test = remaining[group.name].popleft()
+                        for on_next in self.on_next:
+                            on_next(test.number)
+                        future = lanes.submit(run_detached, func, test)
+                        submitted[group.name].append((test, future))
+                        in_flight.append(future)
+                if not any(submitted.values()):
+                    break
+                if not any(pending[0][1].done() for pending in submitted.values() if pending):
+                    wait(in_flight, return_when=FIRST_COMPLETED)
+                for group in self.groups:
+                    pending = submitted[group.name]
+                    while pending and pending[0][1].done():
+                        test, future = pending.popleft()
+                        test.verdict = future.result()
+                        if test.verdict is None:
+                            lanes.cancel()
+                            raise NoVerdictError()
+                        if not test.verdict.is_ok():
+                            for _, skipped_future in pending:
+                                lanes.cancel_task(skipped_future)
+                            pending.clear()
+                            remaining[group.name].clear()
+        self.verdict = self.make_verdict()
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self):
+        for group in self.groups:
+            if not self.is_ready(group):
+                continue
+            for test in group.tests:
+                for func in self.on_next:
+                    func(test.number)
+                yield test
+                test.release()
+                if test.verdict is None:
+                    raise NoVerdictError()
+                if not test.verdict.is_ok():
+                    break
+        self.verdict = self.make_verdict()
+
+    def make_verdict(self) -> IOIVerdict:
+        group_verdicts = []
+        start = 0
+        for group in self.groups:
+            group_verdicts.append(group.verdict(self.results.view(start, start + len(group.tests))))
+            start += len(group.tests)
+        status = "ok"
+        for group_verdict in group_verdicts:
+            if not group_verdict.is_ok() and group_verdict.status != "skipped":
+                status = group_verdict.status
+                break
+        points = sum(group_verdict.points for group_verdict in group_verdicts)
+        return IOIVerdict(status, self.verdicts(), points, group_verdicts)
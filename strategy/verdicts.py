@@ -1,4 +1,6 @@
 class Verdict:
+    __slots__ = ('status',)
+
     def __init__(self, status):
         self.status = status
 
@@ -7,12 +9,16 @@ class Verdict:
 
 
 class TestVerdict(Verdict):
+    __slots__ = ('metrics',)
+
     def __init__(self, status, metrics):
         super().__init__(status)
         self.metrics = metrics
 
 
 class ICPCVerdict(Verdict):
+    __slots__ = ('first_test_failed', 'per_test_verdicts')
+
     def __init__(self, status, per_test_verdicts, first_test_failed=None):
         super().__init__(status)
         self.first_test_failed = first_test_failed
@@ -20,13 +26,29 @@ class ICPCVerdict(Verdict):
 
 
 class TestingVerdict(Verdict):
+    __slots__ = ('current_test',)
+
     def __init__(self, current_test):
         super().__init__("testing")
         self.current_test = current_test
 
 
 class IOIVerdict(Verdict):
-    def __init__(self, status, per_test_verdicts, points):
+    __slots__ = ('points', 'per_test_verdicts', 'per_group_verdicts')
+
+    def __init__(self, status, per_test_verdicts, points, per_group_verdicts=None):
+        super().__init__(status)
+        self.points = points
+        self.per_test_verdicts = per_test_verdicts
+        self.per_group_verdicts = per_group_verdicts if per_group_verdicts is not None else []
+
+
+class GroupVerdict(Verdict):
+    __slots__ = ('group', 'points', 'first_test_failed', 'per_test_verdicts')
+
+    def __init__(self, group, status, per_test_verdicts, points, first_test_failed=None):
         super().__init__(status)
+        self.group = group
         self.points = points
+        self.first_test_failed = first_test_failed
         self.per_test_verdicts = per_test_verdicts
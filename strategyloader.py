@@ -0,0 +1,58 @@
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, mode='rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StrategyLoader:
+    def __init__(self, max_modules=64):
+        self.max_modules = max_modules
+        self.lock = threading.Lock()
+        self.modules = OrderedDict()
+
+    def load(self, strategy_path):
+        strategy_path = os.path.abspath(strategy_path)
+        strategy_stat = os.stat(strategy_path)
+        with self.lock:
+            cached = self.modules.get(strategy_path)
+            if cached is not None and cached[:2] == (strategy_stat.st_mtime_ns, strategy_stat.st_size):
+                self.modules.move_to_end(strategy_path)
+                return cached[3]
+
+            digest = file_digest(strategy_path)
+            if cached is not None and cached[2] == digest:
+                module = cached[3]
+            else:
+                if cached is not None:
+                    sys.modules.pop(cached[3].__name__, None)
+                module = self.import_strategy(strategy_path, digest)
+            self.modules[strategy_path] = (strategy_stat.st_mtime_ns, strategy_stat.st_size, digest, module)
+            self.modules.move_to_end(strategy_path)
+            while len(self.modules) > self.max_modules:
+                evicted_path, evicted = self.modules.popitem(last=False)
+                sys.modules.pop(evicted[3].__name__, None)
+            return module
+
+    @staticmethod
+    def import_strategy(strategy_path, digest):
+        namespace = hashlib.sha256(f"{strategy_path}:{digest}".encode()).hexdigest()[:16]
+        module_name = f"novocode_strategy_{namespace}"
+        spec = importlib.util.spec_from_file_location(module_name, strategy_path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        return module
@@ -0,0 +1,209 @@
+import logging
+import threading
+
+SUBMISSIONS_KEY = "novocode:submissions"
+READY_KEY = "novocode:ready"
+OWNER_QUEUE_KEY_PREFIX = "novocode:queues:"
+ROTATION_KEY_PREFIX = "novocode:owners:"
+CLASSES_KEY = "novocode:submission_classes"
+DISPATCHER_LOCK_KEY = "novocode:dispatcher"
+PROCESSING_KEY_PREFIX = "novocode:processing:"
+INVOKER_KEY_PREFIX = "novocode:invokers:"
+PRIORITY_CLASSES = ("contest", "practice", "rejudge")
+DEFAULT_PRIORITY_CLASS = "practice"
+DISPATCH_BATCH = 64
+
+
+def owner_queue_key(priority_class, owner):
+    return f"{OWNER_QUEUE_KEY_PREFIX}{priority_class}:{owner}"
+
+
+def rotation_key(priority_class):
+    return f"{ROTATION_KEY_PREFIX}{priority_class}"
+
+
+class SubmissionQueue:
+    def __init__(self, r, node, heartbeat_ttl=30, classify=None, capacity=None):
+        self.r = r
+        self.node = node
+        self.heartbeat_ttl = heartbeat_ttl
+        self.classify = classify
+        self.capacity = capacity
+        self.stopped = threading.Event()
+
+    def processing_key(self, consumer):
+        return f"{PROCESSING_KEY_PREFIX}{self.node}:{consumer}"
+
+    def heartbeat(self):
+        free_slots = self.capacity() if self.capacity is not None else 1
+        self.r.set(f"{INVOKER_KEY_PREFIX}{self.node}", free_slots, ex=self.heartbeat_ttl)
+
+    def start_heartbeat(self):
+        self.heartbeat()
+
+        def beat():
+            while not self.stopped.wait(self.heartbeat_ttl / 3):
+                try:
+                    self.heartbeat()
+                    self.reclaim()
+                except Exception as ex:
+                    logging.warning(f"Failed to send invoker heartbeat: {ex}")
+
+        threading.Thread(target=beat, name="heartbeat", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.r.delete(f"{INVOKER_KEY_PREFIX}{self.node}")
+
+    def is_alive(self, node):
+        return node == self.node or self.r.exists(f"{INVOKER_KEY_PREFIX}{node}")
+
+    def free_slots(self):
+        free_slots = dict()
+        for key in self.r.scan_iter(match=f"{INVOKER_KEY_PREFIX}*"):
+            value = self.r.get(key)
+            if value is not None:
+                free_slots[key[len(INVOKER_KEY_PREFIX):]] = int(value)
+        return free_slots
+
+    def should_yield(self):
+        if self.capacity is None:
+            return False
+        own_slots = self.capacity()
+        return any(
+            slots > own_slots for node, slots in self.free_slots().items() if node != self.node
+        )
+
+    def reclaim(self):
+        reclaimed = []
+        for key in self.r.scan_iter(match=f"{PROCESSING_KEY_PREFIX}*"):
+            node = key[len(PROCESSING_KEY_PREFIX):].rsplit(':', 1)[0]
+            if self.is_alive(node):
+                continue
+            while (submission_id := self.r.lmove(key, SUBMISSIONS_KEY, "RIGHT", "LEFT")) is not None:
+                reclaimed.append(submission_id)
+        if reclaimed:
+            logging.info(f"Reclaimed submissions from dead invokers: {reclaimed}")
+        return reclaimed
+
+    def depth(self):
+        depth = self.r.llen(SUBMISSIONS_KEY)
+        for key in self.r.scan_iter(match=f"{OWNER_QUEUE_KEY_PREFIX}*"):
+            depth += self.r.llen(key)
+        return depth
+
+    def classify_submission(self, submission_id):
+        stored = self.r.hget(CLASSES_KEY, submission_id)
+        if stored is not None:
+            priority_class, _, owner = stored.partition(':')
+            return priority_class, owner
+        priority_class, owner = self.classify(submission_id) if self.classify is not None else (None, "")
+        if priority_class not in PRIORITY_CLASSES:
+            priority_class = DEFAULT_PRIORITY_CLASS
+        return priority_class, str(owner)
+
+    def enqueue(self, submission_id, priority_class, owner):
+        pipeline = self.r.pipeline()
+        pipeline.hset(CLASSES_KEY, submission_id, f"{priority_class}:{owner}")
+        pipeline.rpush(owner_queue_key(priority_class, owner), submission_id)
+        pipeline.lrem(self.processing_key("dispatcher"), 1, submission_id)
+        pipeline.rpush(READY_KEY, priority_class)
+        pipeline.execute()
+        self.ensure_rotation(priority_class, owner)
+
+    def ensure_rotation(self, priority_class, owner):
+        if self.r.lpos(rotation_key(priority_class), owner) is None:
+            self.r.rpush(rotation_key(priority_class), owner)
+
+    def dispatch(self, timeout=0):
+        if not self.r.set(DISPATCHER_LOCK_KEY, self.node, nx=True, ex=self.heartbeat_ttl):
+            return None
+        dispatched = 0
+        processing_key = self.processing_key("dispatcher")
+        try:
+            while dispatched < DISPATCH_BATCH:
+                if dispatched == 0 and timeout > 0:
+                    submission_id = self.r.blmove(SUBMISSIONS_KEY, processing_key, timeout, "LEFT", "RIGHT")
+                else:
+                    submission_id = self.r.lmove(SUBMISSIONS_KEY, processing_key, "LEFT", "RIGHT")
+                if submission_id is None:
+                    break
+                try:
+                    priority_class, owner = self.classify_submission(submission_id)
+                except Exception as ex:
+                    logging.warning(f"Failed to classify submission {submission_id}: {ex}")
+                    self.r.lmove(processing_key, SUBMISSIONS_KEY, "RIGHT", "LEFT")
+                    break
+                self.enqueue(submission_id, priority_class, owner)
+                dispatched += 1
+        finally:
+            self.r.delete(DISPATCHER_LOCK_KEY)
+        return dispatched
+
+    def start_dispatcher(self):
+        def run():
+            while not self.stopped.is_set():
+                try:
+                    if self.dispatch(self.heartbeat_ttl / 3) is None:
+                        self.stopped.wait(self.heartbeat_ttl / 3)
+                except Exception as ex:
+                    logging.warning(f"Failed to dispatch submissions: {ex}")
+                    self.stopped.wait(self.heartbeat_ttl / 3)
+
+        threading.Thread(target=run, name="dispatcher", daemon=True).start()
+
+    def pick(self, priority_class, consumer):
+        rotation = rotation_key(priority_class)
+        for _ in range(self.r.llen(rotation)):
+            owner = self.r.lmove(rotation, rotation, "LEFT", "RIGHT")
+            if owner is None:
+                return None
+            queue_key = owner_queue_key(priority_class, owner)
+            submission_id = self.r.lmove(queue_key, self.processing_key(consumer), "LEFT", "RIGHT")
+            if submission_id is not None:
+                return submission_id
+            self.r.lrem(rotation, 0, owner)
+            if self.r.llen(queue_key):
+                self.ensure_rotation(priority_class, owner)
+        return None
+
+    def pick_next(self, consumer):
+        for priority_class in PRIORITY_CLASSES:
+            submission_id = self.pick(priority_class, consumer)
+            if submission_id is not None:
+                self.heartbeat()
+                return submission_id
+        return None
+
+    def wait_ready(self, timeout):
+        if timeout <= 0:
+            return self.r.lpop(READY_KEY)
+        ready = self.r.blpop([READY_KEY], timeout=timeout)
+        return ready[1] if ready is not None else None
+
+    def pop(self, consumer, timeout=1):
+        self.dispatch()
+        yielded = False
+        while True:
+            token = self.wait_ready(timeout)
+            if token is not None and not yielded and self.should_yield():
+                self.r.lpush(READY_KEY, token)
+                yielded = True
+                continue
+            if token is not None or (timeout > 0 and not yielded):
+                return self.pick_next(consumer)
+            return None
+
+    def ack(self, consumer, submission_id):
+        pipeline = self.r.pipeline()
+        pipeline.lrem(self.processing_key(consumer), 1, submission_id)
+        pipeline.hdel(CLASSES_KEY, submission_id)
+        pipeline.execute()
+        self.heartbeat()
+
+    def requeue(self, consumer, submission_id):
+        pipeline = self.r.pipeline()
+        pipeline.lrem(self.processing_key(consumer), 1, submission_id)
+        pipeline.rpush(SUBMISSIONS_KEY, submission_id)
+        pipeline.execute()
+        self.heartbeat()
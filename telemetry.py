@@ -0,0 +1,176 @@
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+submission_labels = contextvars.ContextVar("submission_labels", default={})
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label_value(value)}"' for key, value in labels) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = dict()
+
+    def label_values(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for labels, value in self.values.items():
+                lines.extend(self.render_value(labels, value))
+        return lines
+
+    def render_value(self, labels, value):
+        return [f"{self.name}{format_labels(labels)} {value}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self.label_values(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.label_values(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def render_value(self, labels, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+        lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = list()
+        self.collectors = list()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, func):
+        self.collectors.append(func)
+
+    def render(self):
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as ex:
+                logging.warning(f"Failed to collect metrics: {ex}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host=""):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        return server
+
+    def write_textfile(self, path):
+        temporary_path = f"{path}.{uuid.uuid4().hex}"
+        with open(temporary_path, mode='w') as textfile:
+            textfile.write(self.render())
+        os.replace(temporary_path, path)
+
+    def write_textfile_periodically(self, path, interval, stopped):
+        def write():
+            while not stopped.wait(interval):
+                try:
+                    self.write_textfile(path)
+                except OSError as ex:
+                    logging.warning(f"Failed to write metrics to {path}: {ex}")
+
+        threading.Thread(target=write, name="metrics-textfile", daemon=True).start()
+
+
+registry = Registry()
+
+phase_seconds = registry.register(Histogram(
+    "novocode_phase_seconds", "Time spent in each judging phase.", ("phase", "problem", "compiler", "outcome", "pch"),
+))
+submissions_total = registry.register(Counter(
+    "novocode_submissions_total", "Judged submissions.", ("problem", "compiler", "outcome"),
+))
+queue_depth = registry.register(Gauge("novocode_queue_depth", "Submissions waiting in the queue."))
+active_workers = registry.register(Gauge("novocode_active_workers", "Workers judging a submission."))
+box_pool_size = registry.register(Gauge("novocode_box_pool_size", "Isolate boxes available to the invoker."))
+box_pool_in_use = registry.register(Gauge("novocode_box_pool_in_use", "Isolate boxes leased right now."))
+
+
+def record_phase(name, seconds, labels):
+    phase_seconds.observe(seconds, phase=name, **{**submission_labels.get(), **labels})
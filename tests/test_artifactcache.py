@@ -0,0 +1,62 @@
+import os
+
+import strategy.executable
+from strategy.artifactcache import ArtifactCache, set_artifact_cache
+from strategy.executable import TrustedCompilable, use_build_directory
+
+
+def test_compiled_artifact_is_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source_path = tmp_path / "checker.sh"
+    source_path.write_text("echo ok\n")
+    cache = ArtifactCache(str(tmp_path / "artifacts"), 1024 * 1024)
+    set_artifact_cache(cache)
+    try:
+        executable = TrustedCompilable(str(source_path), "cp {0} {1}", "sh {0}").compile()
+        assert os.listdir(cache.path) == [cache.key([str(source_path)], "cp {0} {1}")]
+        os.remove(executable.main_file)
+
+        monkeypatch.setattr(strategy.executable, "TrustedBox", None)
+        cached_executable = TrustedCompilable(str(source_path), "cp {0} {1}", "sh {0}").compile()
+        with open(cached_executable.main_file) as cached:
+            assert cached.read() == "echo ok\n"
+    finally:
+        set_artifact_cache(None)
+
+
+def test_compiled_output_goes_to_build_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    package_path = tmp_path / "package"
+    package_path.mkdir()
+    source_path = package_path / "check.sh"
+    source_path.write_text("echo ok\n")
+    build_path = tmp_path / "build"
+    build_path.mkdir()
+
+    with use_build_directory(str(build_path)):
+        executable = TrustedCompilable(str(source_path), "cp {0} {1}", "sh {0}").compile()
+
+    assert os.path.dirname(executable.main_file) == str(build_path)
+    assert os.listdir(package_path) == ["check.sh"]
+
+
+def test_artifact_key_depends_on_source_and_command(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "artifacts"), 1024)
+    source_path = tmp_path / "a.cpp"
+    source_path.write_text("int main() {}")
+    key = cache.key([str(source_path)], "cp {0} {1}")
+
+    assert cache.key([str(source_path)], "cp -p {0} {1}") != key
+    source_path.write_text("int main() { return 0; }")
+    assert cache.key([str(source_path)], "cp {0} {1}") != key
+
+
+def test_least_recently_used_artifacts_are_evicted(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "artifacts"), 10)
+    for name in ["a", "b"]:
+        (tmp_path / name).write_text("x" * 6)
+        cache.store(name, str(tmp_path / name))
+
+    assert list(cache.sizes) == ["b"]
+    assert not cache.fetch("a", str(tmp_path / "a.out"))
+    assert cache.fetch("b", str(tmp_path / "b.out"))
@@ -0,0 +1,130 @@
+import io
+import os
+
+import strategy.box
+from strategy.box import Box, box_session
+from strategy.metrics import Limits
+
+
+def test_box_session_initializes_box_once(tmp_path, monkeypatch):
+    initialized = []
+    cleaned_up = []
+    box_root = tmp_path / "box_root"
+    (box_root / "box").mkdir(parents=True)
+    (box_root / "tmp").mkdir()
+
+    def init_isolate_box(box_id):
+        initialized.append(box_id)
+        return str(box_root / "box")
+
+    monkeypatch.setattr(strategy.box, "init_isolate_box", init_isolate_box)
+    monkeypatch.setattr(strategy.box, "cleanup_isolate_box", cleaned_up.append)
+    executable = tmp_path / "solution"
+    executable.write_text("")
+    checker = tmp_path / "checker"
+    checker.write_text("")
+
+    with box_session(3):
+        with Box([str(executable)], box_id=3) as box:
+            box.init_files()
+            staged_inode = os.stat(box_root / "files" / "solution").st_ino
+            (box_root / "box" / "__data.out").write_text("junk")
+            (box_root / "tmp" / "leftover").write_text("junk")
+        with Box([str(executable)], box_id=3) as box:
+            assert os.listdir(box.box_path) == []
+            assert os.listdir(box_root / "files") == ["solution"]
+            assert os.stat(box_root / "files" / "solution").st_ino == staged_inode
+            assert os.listdir(box_root / "tmp") == []
+        with Box([str(checker)], box_id=3) as box:
+            box.init_files()
+            assert os.listdir(box.box_path) == ["checker"]
+            assert os.listdir(box_root / "files") == ["checker"]
+        assert cleaned_up == []
+
+    assert initialized == [3]
+    assert cleaned_up == [3]
+
+
+def test_shared_files_are_exposed_through_read_only_mount(tmp_path, monkeypatch):
+    spawned = []
+
+    def run_cancellable(argv):
+        spawned.append(argv)
+        (tmp_path / "box" / "__test.meta").write_text("time:0.1\ntime-wall:0.2\nmax-rss:1024\nexitcode:0\n")
+        return 0
+
+    monkeypatch.setattr(strategy.box, "run_cancellable", run_cancellable)
+    (tmp_path / "box").mkdir()
+    cached = tmp_path / "cache"
+    cached.mkdir()
+    (cached / "01").write_text("1 2\n")
+    (cached / "solution").write_text("")
+    box = Box([str(cached / "solution")], box_id=5)
+    box.box_path = str(tmp_path / "box")
+
+    with open(cached / "01") as stdin:
+        box.run("solution", stdin, None, Limits(1000, 65536, 2000))
+
+    assert f"--dir=/files={tmp_path / 'files'}" in spawned[0]
+    for name in ["__data.in", "solution"]:
+        assert os.readlink(tmp_path / "box" / name) == os.path.join("..", "files", name)
+    assert os.path.samefile(tmp_path / "files" / "__data.in", cached / "01")
+
+
+def test_execute_isolate_passes_argv_without_shell(tmp_path, monkeypatch):
+    spawned = []
+
+    def run_cancellable(argv):
+        spawned.append(argv)
+        (tmp_path / "__test.meta").write_text("time:0.015\ntime-wall:0.020\nmax-rss:1024\nexitcode:1\nstatus:RE\n")
+        return 1
+
+    monkeypatch.setattr(strategy.box, "run_cancellable", run_cancellable)
+    box = Box(box_id=5)
+    box.box_path = str(tmp_path)
+
+    metrics = box.execute_isolate("solution 'two words' a;b", Limits(1000, 65536, 2000))
+
+    argv = spawned[0]
+    assert argv[1] == "--box-id=5"
+    assert argv[argv.index("--") + 1:] == ["solution", "two words", "a;b"]
+    assert (metrics.time_ms, metrics.real_time_ms, metrics.memory_kb, metrics.status) == (15, 20, 1024, "re")
+
+
+def test_output_limit_is_reported_without_reading_output(tmp_path, monkeypatch):
+    spawned = []
+
+    def run_cancellable(argv):
+        spawned.append(argv)
+        (tmp_path / "__data.out").write_bytes(b"x" * 2048)
+        (tmp_path / "__test.meta").write_text("time:0.1\ntime-wall:0.2\nmax-rss:1024\nexitsig:25\nstatus:SG\n")
+        return 1
+
+    monkeypatch.setattr(strategy.box, "run_cancellable", run_cancellable)
+    box = Box(box_id=5)
+    box.box_path = str(tmp_path)
+    stdout = io.StringIO()
+
+    metrics = box.run("solution", None, stdout, Limits(1000, 65536, 2000, output_kb=2))
+
+    assert "--fsize=3" in spawned[0]
+    assert metrics.status == "ol"
+    assert stdout.getvalue() == ""
+    assert not (tmp_path / "__data.out").exists()
+
+
+def test_output_of_exactly_the_limit_is_accepted(tmp_path, monkeypatch):
+    def run_cancellable(argv):
+        (tmp_path / "__data.out").write_bytes(b"x" * 2048)
+        (tmp_path / "__test.meta").write_text("time:0.1\ntime-wall:0.2\nmax-rss:1024\nexitcode:0\n")
+        return 0
+
+    monkeypatch.setattr(strategy.box, "run_cancellable", run_cancellable)
+    box = Box(box_id=5)
+    box.box_path = str(tmp_path)
+    stdout = io.StringIO()
+
+    metrics = box.run("solution", None, stdout, Limits(1000, 65536, 2000, output_kb=2))
+
+    assert metrics.status == "ok"
+    assert len(stdout.getvalue()) == 2048
@@ -0,0 +1,61 @@
+import io
+
+from strategy.checker import Checker, TestlibChecker
+from strategy.executable import TrustedExecutable
+from strategy.metrics import Metrics
+
+
+class RecordingChecker(Checker):
+    def __init__(self, main_file, judgement):
+        super().__init__(main_file)
+        self.judgement = judgement
+        self.files = []
+
+    def __call__(self, stdin=None, stdout=None, files=iter([]), limits=None, args=iter([]), outputs=None):
+        self.received = dict((name, path) for path, name in files)
+        with open(outputs["__judgement"], mode='w') as judgement_file:
+            judgement_file.write(self.judgement)
+        return Metrics(1, 1, 1, "ok")
+
+
+class RecordingTestlibChecker(RecordingChecker, TestlibChecker):
+    pass
+
+
+def test_checker_receives_test_files_by_path(tmp_path):
+    (tmp_path / "check").write_text("")
+    (tmp_path / "01").write_text("1 2\n")
+    (tmp_path / "01.a").write_text("3\n")
+    checker = RecordingChecker(str(tmp_path / "check"), "status: OK\n\n")
+
+    with open(tmp_path / "01") as input, open(tmp_path / "01.a") as answer:
+        judgement = checker.check(input, io.StringIO("3\n"), answer)
+
+    assert judgement.is_ok()
+    assert checker.received["__input"] == str(tmp_path / "01")
+    assert checker.received["__answer"] == str(tmp_path / "01.a")
+
+
+def test_testlib_checker_reports_message(tmp_path):
+    (tmp_path / "check").write_text("")
+    checker = RecordingTestlibChecker(str(tmp_path / "check"), "ok 1 number(s): \"3\"")
+
+    judgement = checker.check(io.StringIO("1 2"), io.StringIO("3"), io.StringIO("3"))
+
+    assert judgement.status == "ok"
+    assert judgement.message == "ok 1 number(s): \"3\""
+
+
+class TrustedChecker(Checker, TrustedExecutable):
+    pass
+
+
+def test_judgement_is_read_back_from_box(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "check.sh").write_text("echo 'status: WA' > \"$4\"\n")
+    checker = TrustedChecker(str(tmp_path / "check.sh"))
+    checker.run_command = "sh {0} {1}"
+
+    judgement = checker.check(io.StringIO("1 2"), io.StringIO("4"), io.StringIO("3"))
+
+    assert judgement.status == "wa"
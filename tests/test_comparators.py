@@ -0,0 +1,53 @@
+import pytest
+
+from strategy.comparators import DoubleChecker, ExactChecker, TokenChecker, differing_tokens
+
+
+def check(checker, tmp_path, output, answer):
+    (tmp_path / "output").write_bytes(output)
+    (tmp_path / "answer").write_bytes(answer)
+    judgement = checker.check_files(str(tmp_path / "input"), str(tmp_path / "output"), str(tmp_path / "answer"))
+    return judgement.status, judgement.message
+
+
+@pytest.mark.parametrize("output, expected", [
+    (b"1 2\n3\n", ("ok", "3 tokens")),
+    (b"  1\n\n2   3", ("ok", "3 tokens")),
+    (b"1 2 4", ("wa", "3rd words differ - expected: '3', found: '4'")),
+    (b"1 2", ("wa", "Unexpected EOF in the participants output")),
+    (b"1 2 3 4", ("wa", "Participant output contains extra tokens")),
+    (b"", ("wa", "Unexpected EOF in the participants output")),
+])
+def test_token_checker(tmp_path, output, expected):
+    assert check(TokenChecker(), tmp_path, output, b"1 2\n3\n") == expected
+
+
+@pytest.mark.parametrize("output, expected", [
+    (b"0.3333334 2\n", ("ok", "2 numbers")),
+    (b"0.3334 2", ("wa", "1st numbers differ - expected: '0.333333', found: '0.333400', error = '0.000067'")),
+    (b"0.333333 2e0", ("ok", "2 numbers")),
+    (b"0.333333 two", ("pe", "Expected double, but \"two\" found")),
+    (b"0.333333", ("pe", "Unexpected end of file - double expected")),
+    (b"0.333333 2 3", ("pe", "Extra information in the output file")),
+])
+def test_double_checker(tmp_path, output, expected):
+    assert check(DoubleChecker(1e-6), tmp_path, output, b"0.333333 2\n") == expected
+
+
+@pytest.mark.parametrize("output, expected", [
+    (b"a b\nc\n", ("ok", "2 lines")),
+    (b"a b\r\nc", ("ok", "2 lines")),
+    (b"a  b\nc\n", ("wa", "1st lines differ - expected: 'a b', found: 'a  b'")),
+    (b"a b\n", ("pe", "Unexpected end of file - line expected")),
+    (b"a b\nc\nd\n", ("pe", "Extra information in the output file")),
+])
+def test_exact_checker(tmp_path, output, expected):
+    assert check(ExactChecker(), tmp_path, output, b"a b\nc\n") == expected
+
+
+def test_tokens_are_compared_across_chunks():
+    answer = b" ".join(str(number).encode() for number in range(1000))
+    output = answer.replace(b" 517 ", b" 518 ")
+
+    assert next(differing_tokens(answer, answer, chunk_size=7)) == (1000, None, None)
+    assert next(differing_tokens(answer, output, chunk_size=7)) == (518, b"517", b"518")
@@ -0,0 +1,70 @@
+import io
+import os
+
+from strategy.files import LazyFile, LazyText, copy_to_path, copy_to_stream, stream_path
+from strategy.test import Test, TestSet
+
+
+def test_file_backed_stream_is_linked(tmp_path):
+    source = tmp_path / "test.in"
+    source.write_text("1 2\n")
+
+    with open(source) as stream:
+        assert stream_path(stream) == str(source)
+        copy_to_path(stream, str(tmp_path / "__data.in"))
+
+    assert os.stat(tmp_path / "__data.in").st_ino == os.stat(source).st_ino
+
+
+def test_in_memory_stream_is_copied(tmp_path):
+    assert stream_path(io.StringIO("1 2")) is None
+    copy_to_path(io.StringIO("1 2"), str(tmp_path / "__data.in"))
+
+    assert (tmp_path / "__data.in").read_text() == "1 2"
+
+
+def test_output_is_copied_to_stream(tmp_path):
+    source = tmp_path / "__data.out"
+    source.write_text("3\n" * 100000)
+
+    with open(tmp_path / "output", mode='w') as output:
+        copy_to_stream(str(source), output)
+    assert (tmp_path / "output").read_text() == source.read_text()
+
+    output = io.StringIO()
+    copy_to_stream(str(source), output)
+    assert output.getvalue() == source.read_text()
+
+
+def test_lazy_file_is_opened_on_demand(tmp_path):
+    source = tmp_path / "test.in"
+    source.write_text("1 2\n3 4\n")
+    data = LazyFile(str(source))
+
+    assert data.stream is None
+    assert stream_path(data) == str(source)
+    assert data.readline() == "1 2\n"
+    assert list(data) == ["3 4\n"]
+    data.release()
+    assert data.stream is None
+    assert data.read() == "1 2\n3 4\n"
+    data.release()
+
+
+def test_lazy_text_is_written_whole_every_time(tmp_path):
+    data = LazyText("1 2")
+
+    assert data.read() == "1 2"
+    copy_to_path(data, str(tmp_path / "__data.in"))
+    assert (tmp_path / "__data.in").read_text() == "1 2"
+
+
+def test_testset_releases_test_data(tmp_path):
+    (tmp_path / "01").write_text("1 2")
+    (tmp_path / "02").write_text("3 4")
+    tests = [Test(number, LazyFile(str(tmp_path / f"0{number}")), LazyText("")) for number in (1, 2)]
+
+    for test in TestSet(tests):
+        assert test.input.read()
+        assert all(other.input.stream is None for other in tests if other is not test)
+    assert all(test.input.stream is None for test in tests)
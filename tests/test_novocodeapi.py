@@ -0,0 +1,51 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from novocodeapi import NovocodeClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    failures = 0
+
+    def do_GET(self):
+        Handler.connections.add(self.client_address)
+        if self.headers["Authorization"] != "Token secret":
+            self.send_response(401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/api/flaky" and Handler.failures < 1:
+            Handler.failures += 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"x" * 3000000 if self.path == "/files/archive.zip" else json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_client_reuses_connections_and_streams_files(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = NovocodeClient("127.0.0.1", server.server_port, "secret", backoff=0)
+        assert client.get("submissions/1") == {"path": "/api/submissions/1"}
+        assert client.get("problems/2") == {"path": "/api/problems/2"}
+        assert client.get("flaky") == {"path": "/api/flaky"}
+        assert len(Handler.connections) == 1
+
+        url = f"http://127.0.0.1:{server.server_port}/files/archive.zip"
+        futures = [client.submit(client.download, url, str(tmp_path / f"{index}.zip")) for index in range(2)]
+        for future in futures:
+            assert (tmp_path / future.result().rsplit('/', 1)[1]).stat().st_size == 3000000
+    finally:
+        server.shutdown()
@@ -0,0 +1,45 @@
+import os
+
+from packagecache import PackageCache
+
+
+def write_package(entry, contents="1 2"):
+    with open(entry.problem_xml_path, mode='w') as problem_xml:
+        problem_xml.write("<problem/>")
+    os.makedirs(entry.package_path)
+    with open(os.path.join(entry.package_path, "test.in"), mode='w') as test:
+        test.write(contents)
+
+
+def test_package_is_downloaded_once(tmp_path):
+    cache = PackageCache(str(tmp_path), 1024 * 1024)
+    downloads = []
+
+    def fetch(entry):
+        downloads.append(entry)
+        write_package(entry)
+
+    key = cache.key("1", "v1")
+    with cache.lease(key, fetch) as first:
+        with cache.lease(key, fetch) as second:
+            assert first.path == second.path
+    with cache.lease(key, fetch) as entry:
+        with open(os.path.join(entry.package_path, "test.in")) as test:
+            assert test.read() == "1 2"
+        assert not os.access(entry.package_path, os.W_OK) or os.geteuid() == 0
+    assert len(downloads) == 1
+    assert cache.key("1", "v1") != cache.key("1", "v2")
+
+
+def test_least_recently_used_package_is_evicted(tmp_path):
+    cache = PackageCache(str(tmp_path), 25)
+
+    with cache.lease(cache.key("1", "v"), lambda entry: write_package(entry, "a" * 10)):
+        pass
+    with cache.lease(cache.key("2", "v"), lambda entry: write_package(entry, "b" * 10)) as second:
+        with cache.lease(cache.key("3", "v"), lambda entry: write_package(entry, "c" * 10)):
+            pass
+        assert os.path.isdir(second.path)
+
+    assert list(cache.sizes) == [cache.key("2", "v")]
+    assert os.listdir(tmp_path) == [cache.key("2", "v")]
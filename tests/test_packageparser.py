@@ -0,0 +1,86 @@
+import os
+
+from packageparser import parse_package
+from strategy.checker import Checker
+from strategy.comparators import DoubleChecker
+from strategy.metrics import Limits
+from strategy.test import ICPCTestSet, IOITestSet
+
+PROBLEM_XML = """<problem path="strategy.py">
+    <checker><file path="check"/><file path="testlib.h"/></checker>
+    <icpc_testset>
+        <test number="1"><test_data><file path="tests/01"/></test_data><test_data>3</test_data></test>
+        <test number="2"><test_data><file path="tests/02"/></test_data><test_data>0</test_data></test>
+    </icpc_testset>
+    <limits time_ms="1000" memory_kb="262144" real_time_ms="2000"/>
+</problem>
+"""
+
+
+def write_package(tmp_path):
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "01").write_text("1 2")
+    (tmp_path / "tests" / "02").write_text("1 -1")
+    (tmp_path / "check").write_text("")
+    (tmp_path / "testlib.h").write_text("")
+    (tmp_path / "problem.xml").write_text(PROBLEM_XML)
+
+
+def assert_package(tmp_path, strategy_path, arguments):
+    checker, testset, limits = arguments
+    assert strategy_path == os.path.join(str(tmp_path), "strategy.py")
+    assert isinstance(checker, Checker)
+    assert checker.files == [str(tmp_path / "testlib.h")]
+    assert isinstance(testset, ICPCTestSet)
+    assert [test.number for test in testset.tests] == [1, 2]
+    assert [test.input.read() for test in testset.tests] == ["1 2", "1 -1"]
+    assert [test.answer.read() for test in testset.tests] == ["3", "0"]
+    assert isinstance(limits, Limits)
+    assert (limits.time_ms, limits.memory_kb, limits.real_time_ms) == (1000, 262144, 2000)
+
+
+def test_package_is_parsed(tmp_path):
+    write_package(tmp_path)
+
+    strategy_path, arguments = parse_package(str(tmp_path / "problem.xml"), str(tmp_path))
+
+    assert_package(tmp_path, strategy_path, arguments)
+
+
+def test_package_manifest_is_reused(tmp_path):
+    write_package(tmp_path)
+    manifest_path = str(tmp_path / "problem.manifest")
+
+    parse_package(str(tmp_path / "problem.xml"), str(tmp_path), manifest_path)
+    (tmp_path / "problem.xml").write_text("<broken")
+    strategy_path, arguments = parse_package(str(tmp_path / "problem.xml"), str(tmp_path), manifest_path)
+
+    assert_package(tmp_path, strategy_path, arguments)
+
+
+def test_ioi_package_is_parsed(tmp_path):
+    (tmp_path / "problem.xml").write_text("""<problem path="strategy.py">
+    <ioi_testset>
+        <group name="1" points="40"><test number="1"><test_data>1</test_data><test_data>1</test_data></test></group>
+        <group name="2" points="60" depends="1">
+            <test number="2"><test_data>2</test_data><test_data>2</test_data></test>
+            <test number="3"><test_data>3</test_data><test_data>3</test_data></test>
+        </group>
+    </ioi_testset>
+</problem>
+""")
+
+    strategy_path, (testset,) = parse_package(str(tmp_path / "problem.xml"), str(tmp_path))
+
+    assert isinstance(testset, IOITestSet)
+    assert [(group.name, group.points, group.depends) for group in testset.groups] == [("1", 40, []), ("2", 60, ["1"])]
+    assert [test.number for test in testset.tests] == [1, 2, 3]
+
+
+def test_builtin_checker_is_parsed(tmp_path):
+    (tmp_path / "problem.xml").write_text('<problem path="strategy.py"><double_checker epsilon="1e-9"/></problem>')
+
+    strategy_path, (checker,) = parse_package(str(tmp_path / "problem.xml"), str(tmp_path))
+
+    assert isinstance(checker, DoubleChecker)
+    assert checker.epsilon == 1e-9
@@ -0,0 +1,40 @@
+import threading
+
+from strategy.box import Box, current_box_id, use_box_id
+from strategy.pool import ResourcePool
+
+
+def test_pool_lease_returns_resource():
+    pool = ResourcePool([3, 4])
+
+    with pool.lease() as first:
+        with pool.lease() as second:
+            assert {first, second} == {3, 4}
+            assert pool.in_use() == 2
+            assert pool.acquire(blocking=False) is None
+    assert pool.in_use() == 0
+
+
+def test_pool_blocks_until_release():
+    pool = ResourcePool([0])
+    leased = []
+
+    resource = pool.acquire()
+    thread = threading.Thread(target=lambda: leased.append(pool.acquire()))
+    thread.start()
+    thread.join(0.05)
+    assert not leased
+    pool.release(resource)
+    thread.join(1)
+    assert leased == [0]
+
+
+def test_box_uses_leased_box_id():
+    assert current_box_id() == 0
+    with use_box_id(5):
+        assert Box().box_id == 5
+        with use_box_id(7):
+            assert Box().box_id == 7
+        assert Box().box_id == 5
+    assert Box().box_id == 0
+    assert Box(box_id=2).box_id == 2
@@ -0,0 +1,42 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from strategy.executable import TrustedCompilable
+from strategy.precompiledheaders import PrecompiledHeaders, header_flags, set_precompiled_headers
+
+
+def test_header_flags_skip_sources_and_outputs():
+    argv = ["g++", "-O2", "-std=c++17", "solution.cpp", "-o", "solution.out", "-c", "-DONLINE_JUDGE"]
+
+    assert header_flags(argv) == ["-O2", "-std=c++17", "-DONLINE_JUDGE"]
+
+
+def test_non_cpp_compilers_are_left_alone(tmp_path):
+    headers = PrecompiledHeaders(str(tmp_path / "pch"))
+
+    assert headers.prepare(["python3", "-m", "py_compile", "a.py"]) == (["python3", "-m", "py_compile", "a.py"], [])
+
+
+@pytest.mark.skipif(shutil.which("g++") is None, reason="g++ is not installed")
+def test_precompiled_header_is_built_once_and_used(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source_path = tmp_path / "solution.cpp"
+    source_path.write_text("#include <bits/stdc++.h>\nint main() { std::cout << std::vector<int>{1, 2}.size(); }\n")
+    headers = PrecompiledHeaders(str(tmp_path / "pch"))
+    set_precompiled_headers(headers)
+    try:
+        for _ in range(2):
+            executable = TrustedCompilable(str(source_path), "g++ -O2 {0} -o {1}", "{0}").compile()
+    finally:
+        set_precompiled_headers(None)
+
+    (pch_key,) = os.listdir(headers.path)
+    assert os.path.exists(os.path.join(headers.path, pch_key, "bits", "stdc++.h.gch"))
+    assert subprocess.run([executable.main_file], capture_output=True, text=True).stdout == "2"
+    argv, dirs = headers.prepare(["g++", "-O2", "solution.cpp", "-o", "solution.out"])
+    result = subprocess.run([*argv, "-H", "-fsyntax-only"], cwd=tmp_path, capture_output=True, text=True)
+    assert dirs == [os.path.join(headers.path, pch_key)]
+    assert "! " + os.path.join(dirs[0], "bits", "stdc++.h.gch") in result.stderr
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from progressreporter import ProgressReporter
+
+
+def test_progress_is_coalesced_and_final_verdict_is_last():
+    sent = []
+    first_progress_sent = threading.Event()
+
+    def send(submission_id, verdict):
+        sent.append((submission_id, verdict))
+        first_progress_sent.set()
+
+    reporter = ProgressReporter(send, interval=0.2)
+    reporter.start()
+    try:
+        reporter.begin("1")
+        reporter.update("1", {"current_test": 1})
+        assert first_progress_sent.wait(1)
+        for test in range(2, 100):
+            reporter.update("1", {"current_test": test})
+        time.sleep(0.3)
+        reporter.update("1", {"current_test": 100})
+        reporter.finish("1", {"format": "icpc"})
+        reporter.update("1", {"current_test": 101})
+        time.sleep(0.3)
+    finally:
+        reporter.stop()
+
+    assert sent == [("1", {"current_test": 1}), ("1", {"current_test": 99}), ("1", {"format": "icpc"})]
+
+
+def test_progress_sent_in_flight_is_not_overtaken_by_final_verdict():
+    sent = []
+    sending = threading.Event()
+
+    def send(submission_id, verdict):
+        if verdict != "final":
+            sending.set()
+            time.sleep(0.2)
+        sent.append(verdict)
+
+    reporter = ProgressReporter(send, interval=0)
+    reporter.start()
+    try:
+        reporter.begin("1")
+        reporter.update("1", "progress")
+        assert sending.wait(1)
+        reporter.finish("1", "final")
+    finally:
+        reporter.stop()
+
+    assert sent == ["progress", "final"]
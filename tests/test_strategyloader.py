@@ -0,0 +1,44 @@
+import os
+
+from strategyloader import StrategyLoader
+
+
+def write_strategy(path, verdict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"def run(*arguments):\n    return {verdict!r}\n")
+
+
+def test_strategy_is_loaded_once(tmp_path):
+    strategy_path = tmp_path / "1" / "strategy.py"
+    write_strategy(strategy_path, "ok")
+    loader = StrategyLoader()
+
+    module = loader.load(str(strategy_path))
+
+    assert module.run() == "ok"
+    assert loader.load(str(strategy_path)) is module
+
+
+def test_strategy_is_reloaded_when_changed(tmp_path):
+    strategy_path = tmp_path / "1" / "strategy.py"
+    write_strategy(strategy_path, "ok")
+    loader = StrategyLoader()
+    module = loader.load(str(strategy_path))
+
+    write_strategy(strategy_path, "wa")
+    os.utime(strategy_path, ns=(0, 0))
+
+    assert loader.load(str(strategy_path)).run() == "wa"
+    assert module.run() == "ok"
+
+
+def test_problems_do_not_share_strategy_modules(tmp_path):
+    write_strategy(tmp_path / "1" / "strategy.py", "ok")
+    write_strategy(tmp_path / "2" / "strategy.py", "ok")
+    loader = StrategyLoader()
+
+    first = loader.load(str(tmp_path / "1" / "strategy.py"))
+    second = loader.load(str(tmp_path / "2" / "strategy.py"))
+
+    assert first is not second
+    assert first.__name__ != second.__name__
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from benchmarks.fakeredis import FakeRedis
+from submissionqueue import SUBMISSIONS_KEY, SubmissionQueue
+
+CLASSES = {
+    "1": (None, "spammer"), "2": (None, "spammer"), "3": (None, "spammer"), "4": (None, "alice"),
+    "5": ("practice", "bob"), "6": ("rejudge", "rejudger"), "7": ("contest", "bob"),
+}
+
+
+def classify(submission_id):
+    return CLASSES[submission_id]
+
+
+class CountingRedis:
+    def __init__(self, r):
+        self.r = r
+        self.commands = 0
+
+    def __getattr__(self, item):
+        self.commands += 1
+        return getattr(self.r, item)
+
+
+def drain(queue):
+    popped = []
+    while (submission_id := queue.pop("0", timeout=0)) is not None:
+        popped.append(submission_id)
+        queue.ack("0", submission_id)
+    return popped
+
+
+def test_submissions_are_picked_by_priority_and_owner():
+    r = FakeRedis()
+    queue = SubmissionQueue(r, "node", classify=classify)
+    r.rpush(SUBMISSIONS_KEY, "1", "2", "3", "4", "5", "6", "7")
+
+    assert drain(queue) == ["7", "1", "4", "5", "2", "3", "6"]
+    assert queue.depth() == 0
+
+
+def test_requeued_submission_keeps_its_class():
+    r = FakeRedis()
+    queue = SubmissionQueue(r, "node", classify=classify)
+    r.rpush(SUBMISSIONS_KEY, "7")
+
+    assert queue.pop("0", timeout=0) == "7"
+    r.rpush(SUBMISSIONS_KEY, "1")
+    queue.requeue("0", "7")
+
+    assert drain(queue) == ["7", "1"]
+
+
+def test_idle_pop_blocks_until_dispatch():
+    r = CountingRedis(FakeRedis())
+    queue = SubmissionQueue(r, "node", classify=classify, heartbeat_ttl=0.3)
+    queue.start_dispatcher()
+    popped = []
+    worker = threading.Thread(target=lambda: popped.append(queue.pop("0", timeout=2)))
+    worker.start()
+    time.sleep(0.5)
+    idle_commands = r.commands
+
+    r.rpush(SUBMISSIONS_KEY, "4")
+    worker.join()
+    queue.stop()
+
+    assert popped == ["4"]
+    assert idle_commands < 20
+
+
+def test_node_with_fewer_free_slots_yields_to_waiting_node():
+    r = FakeRedis()
+    busy = SubmissionQueue(r, "busy", classify=classify, capacity=lambda: 0)
+    idle = SubmissionQueue(r, "idle", classify=classify, capacity=lambda: 4)
+    idle.heartbeat()
+    popped = []
+    worker = threading.Thread(target=lambda: popped.append(idle.pop("0", timeout=2)))
+    worker.start()
+    time.sleep(0.1)
+    r.rpush(SUBMISSIONS_KEY, "4")
+
+    assert busy.should_yield()
+    assert not idle.should_yield()
+    assert busy.pop("0", timeout=0) is None
+    worker.join()
+    assert popped == ["4"]
+
+
+def test_reclaim_moves_dead_node_submissions_back_to_intake():
+    r = FakeRedis()
+    live = SubmissionQueue(r, "live")
+    live.heartbeat()
+    dead = SubmissionQueue(r, "dead", heartbeat_ttl=0.01)
+    dead.heartbeat()
+    r.rpush(dead.processing_key("0"), "1", "2")
+    r.rpush(live.processing_key("0"), "3")
+    time.sleep(0.02)
+
+    assert SubmissionQueue(r, "other").reclaim() == ["2", "1"]
+    assert r.lrange(SUBMISSIONS_KEY, 0, -1) == ["1", "2"]
+    assert r.llen(dead.processing_key("0")) == 0
+    assert r.lrange(live.processing_key("0"), 0, -1) == ["3"]
+
+
+def test_reclaim_skips_live_node():
+    r = FakeRedis()
+    live = SubmissionQueue(r, "live")
+    live.heartbeat()
+    r.rpush(live.processing_key("0"), "3")
+
+    assert SubmissionQueue(r, "other").reclaim() == []
+    assert r.lrange(live.processing_key("0"), 0, -1) == ["3"]
+    assert r.llen(SUBMISSIONS_KEY) == 0
+
+
+def test_ack_removes_submission_from_processing_list():
+    r = FakeRedis()
+    queue = SubmissionQueue(r, "node", classify=classify)
+    r.rpush(SUBMISSIONS_KEY, "4")
+
+    assert queue.pop("0", timeout=0) == "4"
+    assert r.lrange(queue.processing_key("0"), 0, -1) == ["4"]
+    queue.ack("0", "4")
+
+    assert r.llen(queue.processing_key("0")) == 0
+    assert queue.depth() == 0
+
+
+def test_reclaim_skips_own_processing_lists():
+    r = FakeRedis()
+    queue = SubmissionQueue(r, "host-1")
+    r.rpush(queue.processing_key("0"), "3")
+
+    assert queue.reclaim() == []
+    assert r.lrange(queue.processing_key("0"), 0, -1) == ["3"]
@@ -0,0 +1,45 @@
+from strategy.events import add_phase_listener, phase, remove_phase_listener
+from telemetry import Counter, Histogram, Registry
+
+
+def test_histogram_is_rendered_in_prometheus_format():
+    registry = Registry()
+    histogram = registry.register(Histogram("phase_seconds", "Phase time.", ("phase",), buckets=(0.1, 1)))
+    histogram.observe(0.05, phase="solution_run")
+    histogram.observe(0.5, phase="solution_run")
+    histogram.observe(5, phase="solution_run")
+
+    assert registry.render().splitlines() == [
+        "# HELP phase_seconds Phase time.",
+        "# TYPE phase_seconds histogram",
+        'phase_seconds_bucket{phase="solution_run",le="0.1"} 1',
+        'phase_seconds_bucket{phase="solution_run",le="1"} 2',
+        'phase_seconds_bucket{phase="solution_run",le="+Inf"} 3',
+        'phase_seconds_sum{phase="solution_run"} 5.55',
+        'phase_seconds_count{phase="solution_run"} 3',
+    ]
+
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    counter = registry.register(Counter("submissions_total", "Submissions.", ("problem", "outcome")))
+    counter.inc(problem='a"b', outcome="ok")
+    counter.inc(problem='a"b', outcome="ok")
+
+    assert 'submissions_total{problem="a\\"b",outcome="ok"} 2' in registry.render()
+
+
+def test_strategy_phases_reach_listeners():
+    recorded = []
+
+    def listener(name, seconds, labels):
+        recorded.append((name, labels))
+
+    add_phase_listener(listener)
+    try:
+        with phase("checker_run") as labels:
+            labels["outcome"] = "wa"
+    finally:
+        remove_phase_listener(listener)
+
+    assert recorded == [("checker_run", {"outcome": "wa"})]
@@ -1,7 +1,11 @@
 import io
+import threading
+import time
 
+from strategy.box import run_cancellable, set_box_pool
 from strategy.metrics import Metrics
-from strategy.test import Test, TestSet, ICPCTestSet
+from strategy.pool import ResourcePool
+from strategy.test import Test, TestSet, ICPCTestSet, TestGroup, IOITestSet
 from strategy.verdicts import TestVerdict
 
 
@@ -72,3 +76,216 @@ def test_icpc_testset_wa():
     assert len(testset.verdicts()) == len(tests) - 1
     assert testset.verdict.status == "wa"
     assert testset.verdict.first_test_failed == 2
+
+
+def test_parallel_testset_matches_sequential():
+    def check(test):
+        time.sleep(0.01 * (5 - test.number % 5))
+        status = "ok" if test.number % 3 else "wa"
+        test.verdict = TestVerdict(status, Metrics(test.number, 1, 1, "ok"))
+        threads.add(threading.current_thread().name)
+
+    threads = set()
+    started = []
+    testset = TestSet([Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 11)])
+    testset.add_on_next(started.append)
+    set_box_pool(ResourcePool([1, 2, 3]))
+    try:
+        testset.run(check, workers=4)
+    finally:
+        set_box_pool(None)
+
+    assert started == list(range(1, 11))
+    assert len(threads) == 4
+    assert [verdict.metrics.time_ms for verdict in testset.verdicts()] == list(range(1, 11))
+    assert [verdict.status for verdict in testset.verdicts()] == [
+        "ok" if number % 3 else "wa" for number in range(1, 11)
+    ]
+
+
+def test_speculative_icpc_testset_matches_sequential():
+    def check(test):
+        time.sleep(0.01 * (test.number % 3))
+        status = "wa" if test.number in (5, 7) else "ok"
+        test.verdict = TestVerdict(status, Metrics(test.number, 1, 1, "ok"))
+
+    sequential = ICPCTestSet([Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 11)])
+    for test in sequential:
+        check(test)
+    speculative = ICPCTestSet([Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 11)])
+    set_box_pool(ResourcePool([1, 2, 3]))
+    try:
+        speculative.run(check, workers=4)
+    finally:
+        set_box_pool(None)
+
+    assert speculative.verdict.status == sequential.verdict.status == "wa"
+    assert speculative.verdict.first_test_failed == sequential.verdict.first_test_failed == 5
+    assert [verdict.metrics.time_ms for verdict in speculative.verdict.per_test_verdicts] == [1, 2, 3, 4, 5]
+    assert all(test.verdict is None for test in speculative.tests[5:])
+
+
+def make_ioi_testset():
+    def group(name, points, numbers, depends=()):
+        return TestGroup(name, points, [Test(number, io.StringIO(""), io.StringIO("")) for number in numbers], depends)
+
+    return IOITestSet([
+        group("samples", 0, [1, 2]),
+        group("small", 30, [3, 4, 5], ["samples"]),
+        group("medium", 30, [6, 7], ["small"]),
+        group("independent", 40, [8, 9, 10]),
+    ])
+
+
+def check_ioi(test):
+    time.sleep(0.01 * (test.number % 3))
+    status = "wa" if test.number == 4 else "ok"
+    test.verdict = TestVerdict(status, Metrics(test.number, 1, 1, "ok"))
+
+
+def assert_ioi_verdict(testset):
+    verdict = testset.verdict
+    assert verdict.status == "wa"
+    assert verdict.points == 40
+    assert [group.status for group in verdict.per_group_verdicts] == ["ok", "wa", "skipped", "ok"]
+    assert [group.points for group in verdict.per_group_verdicts] == [0, 0, 0, 40]
+    assert verdict.per_group_verdicts[1].first_test_failed == 4
+    assert [test.metrics.time_ms for test in verdict.per_test_verdicts] == [1, 2, 3, 4, 8, 9, 10]
+
+
+def test_ioi_testset_skips_failed_and_dependent_groups():
+    testset = make_ioi_testset()
+    started = []
+    testset.add_on_next(started.append)
+    for test in testset:
+        check_ioi(test)
+
+    assert started == [1, 2, 3, 4, 8, 9, 10]
+    assert_ioi_verdict(testset)
+
+
+def test_parallel_ioi_testset_matches_sequential():
+    testset = make_ioi_testset()
+    set_box_pool(ResourcePool([1, 2, 3]))
+    try:
+        testset.run(check_ioi, workers=4)
+    finally:
+        set_box_pool(None)
+
+    assert_ioi_verdict(testset)
+    assert all(test.verdict is None for test in testset.tests[5:7])
+
+
+def test_parallel_ioi_testset_waits_without_spinning_and_stops_failed_group():
+    def check(test):
+        if test.number == 1:
+            time.sleep(0.5)
+            test.verdict = TestVerdict("wa", Metrics(1, 1, 1, "ok"))
+        elif test.number == 2:
+            test.verdict = TestVerdict("ok", Metrics(2, 1, 1, "ok"))
+        else:
+            run_cancellable(["sleep", "5"])
+            test.verdict = TestVerdict("ok", Metrics(3, 1, 1, "ok"))
+
+    testset = IOITestSet([TestGroup("1", 100, [
+        Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 4)
+    ])])
+    set_box_pool(ResourcePool([1, 2, 3]))
+    started, cpu_started = time.monotonic(), time.thread_time()
+    try:
+        testset.run(check, workers=3)
+    finally:
+        set_box_pool(None)
+
+    assert time.monotonic() - started < 2
+    assert time.thread_time() - cpu_started < 0.2
+    assert testset.verdict.per_group_verdicts[0].status == "wa"
+    assert testset.tests[2].verdict is None
+
+
+def test_probed_icpc_testset_confirms_lower_tests():
+    def check(test):
+        status = "wa" if test.number in (4, 8) else "ok"
+        test.verdict = TestVerdict(status, Metrics(test.number, 1, 1, "ok"))
+
+    sequential = ICPCTestSet([Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 11)])
+    sequential.set_priorities({8: 0.9, 9: 0.5}, 1)
+    started = []
+    sequential.add_on_next(started.append)
+    for test in sequential:
+        check(test)
+    parallel = ICPCTestSet([Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 11)])
+    parallel.set_priorities({8: 0.9, 9: 0.5}, 1)
+    set_box_pool(ResourcePool([1, 2, 3]))
+    try:
+        parallel.run(check, workers=4)
+    finally:
+        set_box_pool(None)
+
+    assert started == [8, 1, 2, 3, 4]
+    for testset in (sequential, parallel):
+        assert testset.verdict.status == "wa"
+        assert testset.verdict.first_test_failed == 4
+        assert [verdict.metrics.time_ms for verdict in testset.verdict.per_test_verdicts] == [1, 2, 3, 4]
+
+
+def test_verdicts_are_stored_in_columns():
+    class CustomVerdict(TestVerdict):
+        pass
+
+    tests = [Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 4)]
+    testset = TestSet(tests)
+    verdicts = testset.verdicts()
+    custom = CustomVerdict("ok", None)
+
+    tests[0].verdict = TestVerdict("ok", Metrics(10, 20, 30, "ok"))
+    tests[2].verdict = custom
+
+    assert len(verdicts) == 2
+    assert (verdicts[0].status, verdicts[0].metrics.time_ms, verdicts[0].metrics.memory_kb) == ("ok", 10, 20)
+    assert verdicts[1] is custom
+    assert tests[1].verdict is None
+    assert not hasattr(tests[0], "__dict__")
+    assert not hasattr(verdicts[0].metrics, "__dict__")
+
+
+def test_verdict_can_be_mutated_after_assignment():
+    tests = [Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 3)]
+    testset = TestSet(tests)
+
+    tests[0].verdict = TestVerdict("ok", Metrics(10, 20, 30, "ok"))
+    tests[0].verdict.status = "wa"
+    tests[0].verdict.metrics.time_ms = 999
+    tests[1].verdict = TestVerdict("ok", Metrics(1, 2, 3, "ok"))
+    tests[1].verdict.metrics.time_ms = 1.5
+    tests[1].verdict.metrics = Metrics(4, 5, 6, "tl")
+
+    assert [(verdict.status, verdict.metrics.time_ms) for verdict in testset.verdicts()] == [("wa", 999), ("ok", 4)]
+    assert tests[1].verdict.metrics.status == "tl"
+    assert not tests[0].verdict.is_ok()
+
+
+def test_saved_verdict_keeps_value_after_slot_is_replaced():
+    tests = [Test(number, io.StringIO(""), io.StringIO("")) for number in range(1, 3)]
+    TestSet(tests)
+
+    tests[0].verdict = TestVerdict("ok", Metrics(10, 20, 30, "ok"))
+    previous = tests[0].verdict
+    previous_metrics = previous.metrics
+    tests[0].verdict = TestVerdict("tl", Metrics(1000, 20, 30, "tl"))
+
+    assert (previous.status, previous_metrics.time_ms, previous_metrics.status) == ("ok", 10, "ok")
+    assert (tests[0].verdict.status, tests[0].verdict.metrics.time_ms) == ("tl", 1000)
+    previous.status = "wa"
+    assert tests[0].verdict.status == "tl"
+
+    tests[1].verdict = TestVerdict("wa", Metrics(1, 2, 3, "ok"))
+    cleared = tests[1].verdict
+    tests[1].verdict = None
+    tests[0].verdict = TestVerdict("ok", Metrics(1, 2, 3, "ok"))
+
+    assert tests[1].verdict is None
+    assert (cleared.status, cleared.metrics.time_ms) == ("wa", 1)
+    tests[1].verdict = cleared
+    assert (tests[1].verdict.status, tests[1].verdict.metrics.time_ms) == ("wa", 1)
+    assert tests[0].verdict is tests[0].verdict
@@ -0,0 +1,21 @@
+from strategy.metrics import Metrics
+from strategy.verdicts import TestVerdict
+from teststats import TestStats
+
+
+def verdict(status):
+    return TestVerdict(status, Metrics(1, 1, 1, "ok"))
+
+
+def test_failure_rates_are_accumulated(tmp_path):
+    stats = TestStats(str(tmp_path / "stats.sqlite3"))
+    stats.record("1-abc", [(1, verdict("ok")), (2, verdict("wa"))])
+    stats.record("1-abc", [(1, verdict("ok")), (2, verdict("ok")), (3, verdict("tl"))])
+    stats.record("2-def", [(1, verdict("wa"))])
+
+    assert stats.rates("1-abc") == {1: (0.0, 0.0), 2: (0.5, 0.0), 3: (1.0, 1.0)}
+    assert stats.priorities("1-abc") == {2: 0.5, 3: 1.0}
+    stats.close()
+
+    reopened = TestStats(str(tmp_path / "stats.sqlite3"))
+    assert reopened.priorities("2-def") == {1: 1.0}
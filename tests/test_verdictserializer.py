@@ -0,0 +1,38 @@
+import json
+
+import verdictserializer
+from strategy.metrics import Metrics
+from strategy.verdicts import ICPCVerdict, TestVerdict
+
+
+def make_verdict():
+    per_test_verdicts = [TestVerdict("ok", Metrics(number, 1024 + number, 2 * number, "ok")) for number in range(1, 1000)]
+    per_test_verdicts.append(TestVerdict("tl", Metrics(1000, 2048, 3000, "tl")))
+    return ICPCVerdict("tl", per_test_verdicts, 1000)
+
+
+def test_compact_icpc_verdict_expands_to_regular_format():
+    verdict = make_verdict()
+    regular = verdictserializer.get_verdict_serializer(verdict)(verdict)
+
+    for encoding in (verdictserializer.COMPACT_ENCODING, verdictserializer.COMPRESSED_ENCODING):
+        compact = verdictserializer.get_verdict_serializer(verdict, encoding)(verdict)
+        assert compact['format'] == 'icpc_compact'
+        assert len(json.dumps(compact)) < len(json.dumps(regular)) / 2
+        assert verdictserializer.expand_verdict(json.loads(json.dumps(compact))) == regular
+
+
+def test_regular_format_is_used_without_encoding():
+    verdict = make_verdict()
+
+    assert verdictserializer.get_verdict_serializer(verdict)(verdict)['format'] == 'icpc'
+    assert verdictserializer.expand_verdict({'format': 'testing', 'current_test': 1}) == {
+        'format': 'testing', 'current_test': 1
+    }
+
+
+def test_encoding_is_negotiated_from_advertised_support():
+    assert verdictserializer.negotiate_encoding([]) is None
+    assert verdictserializer.negotiate_encoding(["compact"]) == verdictserializer.COMPACT_ENCODING
+    assert verdictserializer.negotiate_encoding(["compact", "compact+zlib"]) == verdictserializer.COMPRESSED_ENCODING
+    assert verdictserializer.negotiate_encoding(["compact+zlib"], ["compact"]) is None
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import threading
+
+
+class TestStats:
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS test_stats ("
+                "problem TEXT NOT NULL, test INTEGER NOT NULL, "
+                "runs INTEGER NOT NULL, failures INTEGER NOT NULL, timeouts INTEGER NOT NULL, "
+                "PRIMARY KEY (problem, test))"
+            )
+
+    def record(self, problem, verdicts):
+        rows = [
+            (problem, number, int(not verdict.is_ok()), int(verdict.status == "tl"))
+            for number, verdict in verdicts
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO test_stats VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT (problem, test) DO UPDATE SET "
+                "runs = runs + 1, failures = failures + excluded.failures, timeouts = timeouts + excluded.timeouts",
+                rows
+            )
+
+    def rates(self, problem):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT test, runs, failures, timeouts FROM test_stats WHERE problem = ?", (problem,)
+            ).fetchall()
+        return {test: (failures / runs, timeouts / runs) for test, runs, failures, timeouts in rows}
+
+    def priorities(self, problem):
+        return {test: failure_rate for test, (failure_rate, _) in self.rates(problem).items() if failure_rate > 0}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,12 +1,33 @@
+import base64
+import json
+import zlib
+
 import strategy.verdicts
+from strategy.results import StoredVerdict, VerdictView
+
+COMPACT_ENCODING = "compact"
+COMPRESSED_ENCODING = "compact+zlib"
+METRICS_COLUMNS = ('time_ms', 'memory_kb', 'real_time_ms')
+
 
+def negotiate_encoding(supported, preferred=(COMPRESSED_ENCODING, COMPACT_ENCODING)):
+    return next((encoding for encoding in preferred if encoding in supported), None)
 
-def get_verdict_serializer(verdict):
+
+def get_verdict_serializer(verdict, encoding=None):
     serializers = {
         strategy.verdicts.TestVerdict: serialize_test,
+        StoredVerdict: serialize_test,
         strategy.verdicts.TestingVerdict: serialize_testing,
         strategy.verdicts.ICPCVerdict: serialize_icpc,
+        strategy.verdicts.IOIVerdict: serialize_ioi,
+    }
+    compact_serializers = {
+        strategy.verdicts.ICPCVerdict: serialize_icpc_compact,
     }
+    if encoding in (COMPACT_ENCODING, COMPRESSED_ENCODING) and type(verdict) in compact_serializers:
+        serializer = compact_serializers[type(verdict)]
+        return lambda verdict: serializer(verdict, compress=encoding == COMPRESSED_ENCODING)
     return serializers[type(verdict)]
 
 
@@ -26,6 +47,31 @@ def serialize_test(verdict):
     }
 
 
+def iter_test_fields(verdicts):
+    if isinstance(verdicts, VerdictView):
+        return verdicts.fields()
+    return (
+        (verdict.status, verdict.metrics.time_ms, verdict.metrics.memory_kb, verdict.metrics.real_time_ms,
+         verdict.metrics.status)
+        for verdict in verdicts
+    )
+
+
+def serialize_tests(verdicts):
+    return [
+        {
+            'metrics': {
+                'time_ms': time_ms,
+                'memory_kb': memory_kb,
+                'real_time_ms': real_time_ms,
+                'status': metrics_status,
+            },
+            'status': status,
+        }
+        for status, time_ms, memory_kb, real_time_ms, metrics_status in iter_test_fields(verdicts)
+    ]
+
+
 def serialize_testing(verdict):
     return {
         'format': 'testing',
@@ -37,7 +83,94 @@ def serialize_icpc(verdict):
     return {
         'format': 'icpc',
         'first_test_failed': verdict.first_test_failed,
-        'per_test_metrics': [
-            serialize_test(test) for test in verdict.per_test_verdicts
+        'per_test_metrics': serialize_tests(verdict.per_test_verdicts),
+    }
+
+
+def serialize_group(verdict):
+    return {
+        'group': verdict.group,
+        'status': verdict.status,
+        'points': verdict.points,
+        'first_test_failed': verdict.first_test_failed,
+        'per_test_metrics': serialize_tests(verdict.per_test_verdicts),
+    }
+
+
+def serialize_ioi(verdict):
+    return {
+        'format': 'ioi',
+        'status': verdict.status,
+        'points': verdict.points,
+        'per_group': [
+            serialize_group(group) for group in verdict.per_group_verdicts
         ]
     }
+
+
+def serialize_tests_compact(verdicts):
+    statuses = dict()
+    columns = {column: [] for column in METRICS_COLUMNS}
+    columns['metrics_status'] = []
+    columns['status'] = []
+    for status, time_ms, memory_kb, real_time_ms, metrics_status in iter_test_fields(verdicts):
+        columns['time_ms'].append(time_ms)
+        columns['memory_kb'].append(memory_kb)
+        columns['real_time_ms'].append(real_time_ms)
+        columns['metrics_status'].append(statuses.setdefault(metrics_status, len(statuses)))
+        columns['status'].append(statuses.setdefault(status, len(statuses)))
+    columns['statuses'] = list(statuses)
+    return columns
+
+
+def compress_columns(columns):
+    data = json.dumps(columns, separators=(',', ':')).encode()
+    return {
+        'encoding': 'zlib+base64',
+        'data': base64.b64encode(zlib.compress(data)).decode('ascii'),
+    }
+
+
+def decompress_columns(columns):
+    if columns.get('encoding') != 'zlib+base64':
+        return columns
+    return json.loads(zlib.decompress(base64.b64decode(columns['data'])))
+
+
+def serialize_icpc_compact(verdict, compress=False):
+    columns = serialize_tests_compact(verdict.per_test_verdicts)
+    return {
+        'format': 'icpc_compact',
+        'first_test_failed': verdict.first_test_failed,
+        'per_test_metrics': compress_columns(columns) if compress else columns,
+    }
+
+
+def expand_tests(columns):
+    columns = decompress_columns(columns)
+    statuses = columns['statuses']
+    return [
+        {
+            'metrics': {
+                'time_ms': time_ms,
+                'memory_kb': memory_kb,
+                'real_time_ms': real_time_ms,
+                'status': statuses[metrics_status],
+            },
+            'status': statuses[status],
+        }
+        for time_ms, memory_kb, real_time_ms, metrics_status, status in zip(
+            columns['time_ms'], columns['memory_kb'], columns['real_time_ms'],
+            columns['metrics_status'], columns['status'],
+        )
+    ]
+
+
+def expand_verdict(serialized_verdict):
+    if serialized_verdict.get('format') != 'icpc_compact':
+        return serialized_verdict
+    return {
+        'format': 'icpc',
+        'first_test_failed': serialized_verdict['first_test_failed'],
+        'per_test_metrics': expand_tests(serialized_verdict['per_test_metrics']),
+    }